@@ -1,19 +1,58 @@
+import os
+import json
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # figures are only saved to files; Agg is safe in worker processes
 import matplotlib.pyplot as plt
+from matplotlib import cbook
 import seaborn as sns
 
+from metrics_store import metrics_version, query_metrics
+
+METRICS = ['tables_extracted', 'extraction_time', 'memory_usage', 'cpu_usage']
+
+# Above this many PDFs the per-PDF figures only show the top-N PDFs
+LARGE_FIGURE_THRESHOLD = 50
+
+# Maximum points drawn in the scatter plot
+MAX_SCATTER_POINTS = 5000
+
+# Boxplot whiskers reach the furthest point within this many IQRs of the box, as in seaborn
+BOX_WHISKER_IQR = 1.5
+
+# Bumped when the cached aggregates change shape
+AGGREGATES_VERSION = 2
+
+def load_performance_data(source):
+    """
+    Read table extraction metrics from a CSV or from the latest run in the metrics store.
+
+    Args:
+        source (str): A performance CSV or a metrics database ('.db').
+
+    Returns:
+        pd.DataFrame: One row per (PDF, method) with the CSV column names.
+    """
+    if source.endswith('.db'):
+        return query_metrics(source, kind='tables', latest_run=True).drop(columns=['run_id', 'extracted_text_length'])
+    return pd.read_csv(source)
+
+
 def analyze_extraction_performance(performance_csv='./performance_metrics/table_extraction_performance.csv'):
     """
     Comprehensive analysis of PDF extraction performance metrics
     
     Args:
-        performance_csv (str): Path to performance metrics CSV file
+        performance_csv (str): Path to performance metrics CSV file (or the metrics database)
     
     Returns:
         dict: Summary statistics and visualization details
     """
     # Read performance data
-    df = pd.read_csv(performance_csv)
+    df = load_performance_data(performance_csv)
     
     # Basic summary statistics
     summary_stats = df.groupby('Extraction Method').agg({
@@ -123,9 +162,258 @@ def analyze_extraction_performance(performance_csv='./performance_metrics/table_
         'summary_file': 'performance_metrics/performance_summary.txt'
     }
 
-# Run the analysis
-performance_analysis = analyze_extraction_performance()
 
-# Print summary statistics
-print(performance_analysis['summary_statistics'])
-print("\nVisualizations and summary have been saved in the 'performance_metrics' directory.")
+def box_statistics(df):
+    """
+    Boxplot statistics of every metric per method, computed like seaborn's boxplot.
+
+    Whiskers end at the furthest value within BOX_WHISKER_IQR times the
+    interquartile range of the box and the values beyond them are kept as fliers.
+
+    Args:
+        df (pd.DataFrame): Raw performance metrics.
+
+    Returns:
+        pd.DataFrame: Indexed by (metric, method) with 'med', 'q1', 'q3', 'whislo',
+        'whishi' and 'fliers' (a tuple of values) columns.
+    """
+    rows = {}
+    for method, group in df.groupby('Extraction Method'):
+        for metric in METRICS:
+            stats = cbook.boxplot_stats(group[metric].dropna().to_numpy(), whis=BOX_WHISKER_IQR)[0]
+            rows[(metric, method)] = {
+                'med': stats['med'], 'q1': stats['q1'], 'q3': stats['q3'],
+                'whislo': stats['whislo'], 'whishi': stats['whishi'],
+                'fliers': tuple(float(value) for value in stats['fliers'])
+            }
+    return pd.DataFrame.from_dict(rows, orient='index').sort_index()
+
+
+def compute_aggregates(df, top_n=LARGE_FIGURE_THRESHOLD):
+    """
+    Compute every input the figures need from the raw performance rows.
+
+    Per-method statistics come from one groupby (describe() yields mean, std,
+    min, quartiles and max at once); per-PDF figures use a single pivot that is
+    cut down to the top_n slowest PDFs when the corpus has more PDFs than that.
+
+    Args:
+        df (pd.DataFrame): Raw performance metrics.
+        top_n (int): Number of PDFs kept in per-PDF figures.
+
+    Returns:
+        dict: Aggregated frames keyed by name.
+    """
+    described = df.groupby('Extraction Method')[METRICS].describe()
+    summary_stats = described.loc[:, (slice(None), ['mean', 'min', 'max', 'std'])].round(4)
+    summary_stats = summary_stats.reindex(columns=pd.MultiIndex.from_product([METRICS, ['mean', 'min', 'max', 'std']]))
+
+    per_pdf = df.pivot_table(index='Filename', columns='Extraction Method', values=METRICS)
+    truncated = len(per_pdf) > top_n
+    if truncated:
+        slowest = per_pdf['extraction_time'].sum(axis=1).nlargest(top_n).index
+        per_pdf = per_pdf.loc[slowest]
+
+    scatter = df[['Extraction Method', 'tables_extracted', 'extraction_time']]
+    if len(scatter) > MAX_SCATTER_POINTS:
+        scatter = scatter.sample(MAX_SCATTER_POINTS, random_state=0)
+
+    return {
+        'described': described,
+        'box_stats': box_statistics(df),
+        'summary_stats': summary_stats,
+        'per_pdf': per_pdf,
+        'per_pdf_truncated': truncated,
+        'scatter': scatter.reset_index(drop=True),
+    }
+
+
+def load_aggregates(performance_csv, cache_dir='performance_metrics', top_n=LARGE_FIGURE_THRESHOLD):
+    """Return cached aggregates while the CSV (or metrics database) is unchanged, otherwise recompute and cache them."""
+    if performance_csv.endswith('.db'):
+        # Appends go to the WAL file, so the database file's stat is not a reliable key
+        key = [AGGREGATES_VERSION, os.path.abspath(performance_csv), metrics_version(performance_csv), top_n]
+    else:
+        stat = os.stat(performance_csv)
+        key = [AGGREGATES_VERSION, os.path.abspath(performance_csv), stat.st_size, stat.st_mtime_ns, top_n]
+    cache_path = os.path.join(cache_dir, '.aggregates_cache.pkl')
+
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+        if cached['key'] == key:
+            return cached['aggregates']
+
+    aggregates = compute_aggregates(load_performance_data(performance_csv), top_n)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_path, 'wb') as f:
+        pickle.dump({'key': key, 'aggregates': aggregates}, f)
+    return aggregates
+
+
+def _box_stats(box_stats):
+    """bxp() input for one metric from its rows of box_statistics()."""
+    return [{'label': method, **row, 'fliers': list(row['fliers'])}
+            for method, row in box_stats.to_dict(orient='index').items()]
+
+
+def plot_boxplot(data, path, title, ylabel):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.bxp(_box_stats(data))
+    ax.set_title(title)
+    ax.set_xlabel('Extraction Method')
+    ax.set_ylabel(ylabel)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def plot_scatter(data, path):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for method, group in data.groupby('Extraction Method'):
+        ax.scatter(group['tables_extracted'], group['extraction_time'], label=method, s=12)
+    ax.set_title('Extraction Time vs Tables Extracted')
+    ax.set_xlabel('Tables Extracted')
+    ax.set_ylabel('Extraction Time (seconds)')
+    ax.legend(title='Extraction Method')
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def plot_avg_tables(data, path):
+    means = data[('tables_extracted', 'mean')]
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.bar(means.index, means.values)
+    ax.set_title('Average Tables Extracted by Method')
+    ax.set_ylabel('Average Tables Extracted')
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def plot_heatmap(data, path, truncated):
+    # Annotating every cell is what makes the heatmap slow; only do it for small tables
+    annotate = data.size <= 400
+    fig, ax = plt.subplots(figsize=(12, max(6, min(0.3 * len(data), 40))))
+    sns.heatmap(data, annot=annotate, fmt='.2f', cmap='coolwarm', linewidths=0.5 if annotate else 0, ax=ax)
+    title = 'Performance Metrics Heatmap by PDF and Method'
+    ax.set_title(f"{title} (top {len(data)} slowest PDFs)" if truncated else title)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def plot_tables_per_pdf(data, path, truncated):
+    fig, ax = plt.subplots(figsize=(12, 8))
+    data['tables_extracted'].plot.bar(ax=ax)
+    title = 'Comparison of Tables Extracted by Method for Each PDF'
+    ax.set_title(f"{title} (top {len(data)} slowest PDFs)" if truncated else title)
+    ax.set_ylabel('Tables Extracted')
+    ax.set_xlabel('PDF Files')
+    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+    ax.legend(title='Extraction Method')
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def _figure_specs(aggregates):
+    """(name, plot function, input frame, extra args) for every figure."""
+    described = aggregates['described']
+    box_stats = aggregates['box_stats']
+    per_pdf = aggregates['per_pdf']
+    truncated = aggregates['per_pdf_truncated']
+    return [
+        ('extraction_time_boxplot', plot_boxplot, box_stats.loc['extraction_time'], ('Extraction Time Comparison', 'Time (seconds)')),
+        ('memory_usage_boxplot', plot_boxplot, box_stats.loc['memory_usage'], ('Memory Usage Comparison', 'Memory (MB)')),
+        ('cpu_usage_boxplot', plot_boxplot, box_stats.loc['cpu_usage'], ('CPU Usage Comparison', 'CPU Usage (%)')),
+        ('time_vs_length_scatter', plot_scatter, aggregates['scatter'], ()),
+        ('avg_tables_extracted_bar', plot_avg_tables, described, ()),
+        ('comparison_bar_graph', plot_tables_per_pdf, per_pdf, (truncated,)),
+        ('comparison_heatmap', plot_heatmap, per_pdf, (truncated,)),
+    ]
+
+
+def _input_hash(data, extra):
+    """Stable hash of a figure's input frame and parameters."""
+    flat = data.copy()
+    flat.columns = ['|'.join(map(str, col)) if isinstance(col, tuple) else str(col) for col in flat.columns]
+    values = pd.util.hash_pandas_object(flat, index=True).sum()
+    columns = pd.util.hash_pandas_object(pd.Series(flat.columns), index=False).sum()
+    return f"{int(values)}-{int(columns)}-{extra!r}"
+
+
+def _render(plot_func, data, path, extra):
+    plot_func(data, path, *extra)
+    return path
+
+
+def analyze_extraction_performance_incremental(performance_csv='./performance_metrics/table_extraction_performance.csv',
+                                               output_dir='performance_metrics', max_workers=None,
+                                               top_n=LARGE_FIGURE_THRESHOLD):
+    """
+    Fast variant of analyze_extraction_performance for large or repeated runs.
+
+    Aggregates are computed once and cached next to the figures, figures whose
+    input aggregates did not change since the last run are skipped, the rest are
+    rendered in parallel with the Agg backend, and per-PDF figures switch to the
+    top_n slowest PDFs when the corpus has more PDFs than that.
+
+    Args:
+        performance_csv (str): Path to performance metrics CSV file (or the metrics database)
+        output_dir (str): Folder for figures, summary and caches
+        max_workers (int, optional): Render processes; 1 renders in-process
+        top_n (int): PDFs kept in per-PDF figures for large corpora
+
+    Returns:
+        dict: Summary statistics, visualization paths and the figures re-rendered
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    aggregates = load_aggregates(performance_csv, output_dir, top_n)
+
+    hash_path = os.path.join(output_dir, '.figure_hashes.json')
+    previous_hashes = {}
+    if os.path.exists(hash_path):
+        with open(hash_path, 'r') as f:
+            previous_hashes = json.load(f)
+
+    hashes, paths, pending = {}, [], []
+    for name, plot_func, data, extra in _figure_specs(aggregates):
+        path = os.path.join(output_dir, f'{name}.png')
+        paths.append(path)
+        hashes[name] = _input_hash(data, extra)
+        if previous_hashes.get(name) != hashes[name] or not os.path.exists(path):
+            pending.append((plot_func, data, path, extra))
+
+    if max_workers == 1 or len(pending) <= 1:
+        rendered = [_render(*job) for job in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            rendered = list(executor.map(_render, *zip(*pending)))
+
+    with open(hash_path, 'w') as f:
+        json.dump(hashes, f, indent=1)
+
+    summary_stats = aggregates['summary_stats']
+    summary_file = os.path.join(output_dir, 'performance_summary.txt')
+    with open(summary_file, 'w') as f:
+        f.write("PDF Extraction Performance Summary\n")
+        f.write("==================================\n\n")
+        f.write(str(summary_stats))
+
+    return {
+        'summary_statistics': summary_stats,
+        'visualizations': paths,
+        'rendered': rendered,
+        'summary_file': summary_file
+    }
+
+
+if __name__ == "__main__":
+    # Run the analysis
+    performance_analysis = analyze_extraction_performance()
+
+    # Print summary statistics
+    print(performance_analysis['summary_statistics'])
+    print("\nVisualizations and summary have been saved in the 'performance_metrics' directory.")
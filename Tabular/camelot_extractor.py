@@ -3,6 +3,8 @@ import camelot
 import pandas as pd
 from pathlib import Path
 from helper_functions import *
+from tracing import span
+from pdf_input import pages_with_text
 import warnings
 
 def extract_with_camelot(input_folder, output_folder='camelot'):
@@ -20,7 +22,8 @@ def extract_with_camelot(input_folder, output_folder='camelot'):
         Path(pdf_output_folder).mkdir(exist_ok=True)
 
         try:
-            tables = camelot.read_pdf(pdf_path, pages='all', flavor='stream') 
+            with span('camelot.read_pdf', file=filename):
+                tables = camelot.read_pdf(pdf_path, pages='all', flavor='stream') 
             valid_tables = []
 
             if tables:  # Check if any tables were found
@@ -35,7 +38,8 @@ def extract_with_camelot(input_folder, output_folder='camelot'):
 
             for i, table in enumerate(valid_tables, 1):
                 output_path = os.path.join(pdf_output_folder, f"table_{i}.csv")
-                table.to_csv(output_path, index=False)
+                with span('csv_write'):
+                    table.to_csv(output_path, index=False)
 
         except Exception as e:
             print(f"Camelot error processing {filename}: {str(e)}")
@@ -48,39 +52,58 @@ def extract_with_camelot(input_folder, output_folder='camelot'):
 
     return table_counts
 
+def _table_location(table):
+    """Page and bbox (fractions of the page, top-left origin) of a Camelot table."""
+    bbox = None
+    pdf_size = getattr(table, 'pdf_size', None)
+    # _bbox is private to Camelot and absent from some versions
+    points = getattr(table, '_bbox', None)
+    if pdf_size and points:
+        # Camelot reports bboxes in PDF points with the origin at the bottom left
+        width, height = pdf_size
+        x0, y0, x1, y1 = points
+        bbox = [x0 / width, 1 - y1 / height, x1 / width, 1 - y0 / height]
+    return {'page': int(table.page), 'bbox': bbox}
+
 def extract_with_camelot_single(pdf_path, output_folder='camelot'):
-    """Extract tables from a single PDF using Camelot."""
+    """Extract tables from a single PDF using Camelot; errors propagate so the job ledger records and retries them."""
     Path(output_folder).mkdir(parents=True, exist_ok=True)
     pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
     pdf_output_folder = os.path.join(output_folder, pdf_name)
     Path(pdf_output_folder).mkdir(exist_ok=True)
 
-    table_counts = 0
-
-    try:
-        # Extract tables using Camelot
-        tables = camelot.read_pdf(pdf_path, pages='all', flavor='stream')
-        valid_tables = []
-
-        if tables:
-            for table in tables:
-                cleaned_table = clean_table(table.df)
-                if cleaned_table is not None:
-                    valid_tables.append(cleaned_table)
+    # Stream tables are built from text, so pages known (from layouts already
+    # parsed by PDFPlumber in this process) to have no characters are skipped
+    text_pages = pages_with_text(pdf_path)
+    with span('camelot.read_pdf', file=os.path.basename(pdf_path)):
+        if text_pages is None:
+            tables = camelot.read_pdf(pdf_path, pages='all', flavor='stream')
+        elif text_pages:
+            tables = camelot.read_pdf(pdf_path, pages=','.join(map(str, text_pages)), flavor='stream')
         else:
-            print(f"No tables found in {pdf_path}")
-
-        table_counts = len(valid_tables)
-
-        # Save extracted tables
-        for i, table in enumerate(valid_tables, 1):
-            output_path = os.path.join(pdf_output_folder, f"table_{i}.csv")
+            tables = []
+    valid_tables = []
+    table_index = []
+
+    if tables:
+        for table in tables:
+            cleaned_table = clean_table(table.df)
+            if cleaned_table is not None:
+                valid_tables.append(cleaned_table)
+                table_index.append(_table_location(table))
+    else:
+        print(f"No tables found in {pdf_path}")
+
+    table_counts = len(valid_tables)
+
+    # Save extracted tables
+    for i, table in enumerate(valid_tables, 1):
+        output_path = os.path.join(pdf_output_folder, f"table_{i}.csv")
+        with span('csv_write'):
             table.to_csv(output_path, index=False)
+        table_index[i - 1]['file'] = os.path.basename(output_path)
+    write_table_index(pdf_output_folder, table_index)
 
-        print(f"Extracted {table_counts} tables from {pdf_path}")
-
-    except Exception as e:
-        print(f"Camelot error processing {pdf_path}: {str(e)}")
-        table_counts = 0
+    print(f"Extracted {table_counts} tables from {pdf_path}")
 
     return {os.path.basename(pdf_path): table_counts}
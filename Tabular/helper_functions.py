@@ -1,6 +1,27 @@
+import os
+import json
 import pandas as pd
+from tracing import traced
+from table_types import convert_column, normalize_headers
 
+# Per-PDF file listing where each saved table came from, read by table_consensus.py
+TABLE_INDEX_FILE = 'tables.json'
 
+
+def write_table_index(pdf_output_folder, entries):
+    """
+    Save the location of every table written for one PDF.
+
+    Args:
+        pdf_output_folder (str): Folder holding the PDF's table CSVs.
+        entries (list): Dicts with 'file', 'page' (1-based or None) and 'bbox'
+            ([x0, top, x1, bottom] as fractions of the page, or None).
+    """
+    with open(os.path.join(pdf_output_folder, TABLE_INDEX_FILE), 'w', encoding='utf-8') as f:
+        json.dump(entries, f, indent=1)
+
+
+@traced('clean_table')
 def clean_table(df):
     """Comprehensive table cleaning function"""
     if df is None or len(df) <= 1 or len(df.columns) <= 1:
@@ -18,6 +39,7 @@ def clean_table(df):
     
     return df if len(df) > 1 and len(df.columns) > 1 else None
 
+@traced('clean_table.remove_empty_rows_cols')
 def remove_empty_rows_cols(df):
     """Remove empty or nearly empty rows and columns"""
     # Remove rows where most values (>90%) are NaN
@@ -34,29 +56,14 @@ def remove_empty_rows_cols(df):
     return df.drop(columns=cols_to_drop)
 
 
+@traced('clean_table.standardize_headers')
 def standardize_headers(df):
-    """Clean and standardize column headers"""
-    df.columns = df.columns.astype(str)
-    df.columns = df.columns.str.strip()
-    df.columns = df.columns.str.lower()
-    df.columns = df.columns.str.replace(r'[\n\r\t]', ' ')
-    df.columns = df.columns.str.replace(r'\s+', '_')
-    df.columns = df.columns.str.replace(r'[^a-z0-9_]', '')
-    
-    # Handle duplicate column names
-    seen = {}
-    new_cols = []
-    for col in df.columns:
-        if col in seen:
-            seen[col] += 1
-            new_cols.append(f"{col}_{seen[col]}")
-        else:
-            seen[col] = 0
-            new_cols.append(col)
-    df.columns = new_cols
+    """Clean and standardize column headers (cached per distinct header row)"""
+    df.columns = normalize_headers(df.columns)
     return df
 
 
+@traced('clean_table.handle_merged_cells')
 def handle_merged_cells(df):
     """Handle merged cells by forward-filling values"""
     # Check for "Unnamed" columns and forward-fill
@@ -67,6 +74,7 @@ def handle_merged_cells(df):
     df = df.fillna(method='ffill')
     return df
 
+@traced('clean_table.remove_duplicate_rows')
 def remove_duplicate_rows(df):
     """Remove duplicate rows while handling near-duplicates"""
     # Remove exact duplicates
@@ -82,22 +90,12 @@ def remove_duplicate_rows(df):
     return df
 
 
+@traced('clean_table.fix_data_types')
 def fix_data_types(df):
-    """Convert columns to appropriate data types"""
+    """Convert columns to appropriate data types, choosing each column's type from a sample"""
     for col in df.columns:
-        # Apply string operations only to object-type columns
-        if df[col].dtype == 'object':
-            # Remove currency symbols and commas
-            cleaned = df[col].str.replace(r'[,$€£]', '', regex=True)
-            cleaned = cleaned.str.replace(',', '')
-
-            # Try converting to numeric
-            try:
-                df[col] = pd.to_numeric(cleaned)
-            except ValueError:
-                # Try converting to datetime
-                try:
-                    df[col] = pd.to_datetime(df[col], format="%Y-%m-%d")
-                except ValueError:
-                    pass
+        series = df[col]
+        converted = convert_column(series)
+        if converted is not series:
+            df[col] = converted
     return df
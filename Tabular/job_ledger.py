@@ -0,0 +1,247 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+
+DEFAULT_LEDGER = 'performance_metrics/job_ledger.db'
+
+# Attempts per job (first try included) before it stays failed
+MAX_ATTEMPTS = 3
+
+# Seconds to wait before the n-th retry: RETRY_BACKOFF * 2 ** (n - 1)
+RETRY_BACKOFF = 1.0
+
+PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    batch TEXT NOT NULL,
+    job_key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    host TEXT,
+    pid INTEGER,
+    last_error TEXT,
+    result TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (batch, job_key)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_batch_status ON jobs(batch, status);
+CREATE TABLE IF NOT EXISTS batches (
+    batch TEXT PRIMARY KEY,
+    run_id TEXT,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def connect(db_path=DEFAULT_LEDGER):
+    """Open (and create if needed) the ledger; WAL lets workers read while another one writes."""
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def job_key(pdf_path, method):
+    """Ledger key of one (pdf, backend) unit of work."""
+    return f"{method}:{os.path.abspath(pdf_path)}"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _write(conn, statement, params=()):
+    """Run one statement in an immediate transaction so concurrent workers serialize on it."""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        cursor = conn.execute(statement, params)
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    return cursor.rowcount
+
+
+def open_batch(batch, keys, resume=True, run_id=None, db_path=DEFAULT_LEDGER):
+    """
+    Register the jobs of a batch and prepare it for a (re)start.
+
+    New keys are added as pending. Jobs left 'running' by a worker that no
+    longer exists on this host are put back to pending. With resume=False the
+    batch starts over, except for jobs a live worker is still running (workers
+    on other hosts are assumed alive): they are left to that worker. With
+    resume=True done jobs are kept.
+
+    Args:
+        batch (str): Batch name, e.g. 'tables:/data/ESG REPORTS'.
+        keys (list): Job keys in processing order.
+        resume (bool): Keep the progress of earlier runs.
+        run_id (str, optional): Metrics run recording the batch, returned by batch_run_id on resume.
+        db_path (str): Ledger database path.
+    """
+    conn = connect(db_path)
+    host = socket.gethostname()
+    now = time.time()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            running = conn.execute(
+                'SELECT job_key, pid, host FROM jobs WHERE batch = ? AND status = ?', (batch, RUNNING)
+            ).fetchall()
+            stale = [key for key, pid, job_host in running if job_host == host and not _pid_alive(pid)]
+            if not resume:
+                conn.execute('DELETE FROM jobs WHERE batch = ? AND status != ?', (batch, RUNNING))
+                conn.executemany('DELETE FROM jobs WHERE batch = ? AND job_key = ?', [(batch, key) for key in stale])
+                if len(running) > len(stale):
+                    print(f"{len(running) - len(stale)} jobs of {batch} are left to the live workers running them")
+            conn.executemany(
+                'INSERT OR IGNORE INTO jobs (batch, job_key, position, status, updated_at) VALUES (?, ?, ?, ?, ?)',
+                [(batch, key, position, PENDING, now) for position, key in enumerate(keys)]
+            )
+            if resume:
+                conn.executemany(
+                    'UPDATE jobs SET status = ?, pid = NULL, updated_at = ? WHERE batch = ? AND job_key = ?',
+                    [(PENDING, now, batch, key) for key in stale]
+                )
+            if run_id is not None:
+                conn.execute('INSERT OR REPLACE INTO batches VALUES (?, ?, ?)', (batch, run_id, now))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+    finally:
+        conn.close()
+
+
+def batch_run_id(batch, db_path=DEFAULT_LEDGER):
+    """Metrics run recorded by the last open_batch of a batch, or None."""
+    conn = connect(db_path)
+    try:
+        row = conn.execute('SELECT run_id FROM batches WHERE batch = ?', (batch,)).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def claim_job(batch, key, max_attempts=MAX_ATTEMPTS, db_path=DEFAULT_LEDGER):
+    """
+    Atomically mark a job running for this process.
+
+    Only pending jobs and failed jobs with attempts left can be claimed, so two
+    workers never run the same job and finished jobs are never repeated.
+
+    Returns:
+        bool: True if this process now owns the job.
+    """
+    conn = connect(db_path)
+    try:
+        return _write(
+            conn,
+            'UPDATE jobs SET status = ?, attempts = attempts + 1, host = ?, pid = ?, updated_at = ? '
+            'WHERE batch = ? AND job_key = ? AND (status = ? OR (status = ? AND attempts < ?))',
+            (RUNNING, socket.gethostname(), os.getpid(), time.time(), batch, key, PENDING, FAILED, max_attempts)
+        ) == 1
+    finally:
+        conn.close()
+
+
+def finish_job(batch, key, result=None, error=None, db_path=DEFAULT_LEDGER):
+    """
+    Record the outcome of a claimed job.
+
+    Args:
+        batch (str): Batch name.
+        key (str): Job key.
+        result: JSON-serializable result kept with the job (e.g. its performance rows).
+        error (str, optional): Error message; marks the job failed instead of done.
+        db_path (str): Ledger database path.
+    """
+    conn = connect(db_path)
+    try:
+        _write(
+            conn,
+            'UPDATE jobs SET status = ?, pid = NULL, last_error = ?, result = ?, updated_at = ? '
+            'WHERE batch = ? AND job_key = ?',
+            (FAILED if error else DONE, error, None if result is None else json.dumps(result), time.time(), batch, key)
+        )
+    finally:
+        conn.close()
+
+
+def run_with_retries(batch, key, func, max_attempts=MAX_ATTEMPTS, db_path=DEFAULT_LEDGER):
+    """
+    Run func() as a ledger job, retrying failures with exponential backoff.
+
+    func returns the job's result; an exception marks the attempt failed.
+    Jobs already done, owned by another worker or out of attempts are skipped.
+
+    Returns:
+        str: The job's status after this call ('done', 'failed', or the status it was skipped in).
+    """
+    while claim_job(batch, key, max_attempts, db_path):
+        try:
+            result = func()
+        except Exception as e:
+            finish_job(batch, key, error=f"{type(e).__name__}: {e}", db_path=db_path)
+            attempts = job_status(batch, key, db_path)['attempts']
+            print(f"Attempt {attempts}/{max_attempts} of {key} failed: {e}")
+            if attempts < max_attempts:
+                time.sleep(RETRY_BACKOFF * 2 ** (attempts - 1))
+            continue
+        finish_job(batch, key, result=result, db_path=db_path)
+        return DONE
+    return job_status(batch, key, db_path)['status']
+
+
+def job_status(batch, key, db_path=DEFAULT_LEDGER):
+    """Status, attempts and last error of one job."""
+    conn = connect(db_path)
+    try:
+        status, attempts, last_error = conn.execute(
+            'SELECT status, attempts, last_error FROM jobs WHERE batch = ? AND job_key = ?', (batch, key)
+        ).fetchone()
+    finally:
+        conn.close()
+    return {'status': status, 'attempts': attempts, 'last_error': last_error}
+
+
+def batch_jobs(batch, db_path=DEFAULT_LEDGER):
+    """
+    Every job of a batch in processing order.
+
+    Returns:
+        dict: Job key to {'status', 'attempts', 'last_error', 'result'}.
+    """
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            'SELECT job_key, status, attempts, last_error, result FROM jobs WHERE batch = ? ORDER BY position', (batch,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return {
+        key: {'status': status, 'attempts': attempts, 'last_error': last_error,
+              'result': None if result is None else json.loads(result)}
+        for key, status, attempts, last_error, result in rows
+    }
+
+
+def batch_summary(batch, db_path=DEFAULT_LEDGER):
+    """Number of jobs per status in a batch."""
+    conn = connect(db_path)
+    try:
+        return dict(conn.execute('SELECT status, COUNT(*) FROM jobs WHERE batch = ? GROUP BY status', (batch,)))
+    finally:
+        conn.close()
@@ -0,0 +1,276 @@
+import os
+import sys
+import time
+import uuid
+import socket
+import sqlite3
+import platform
+import subprocess
+
+import pandas as pd
+
+DEFAULT_DB = 'performance_metrics/metrics.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    host TEXT,
+    platform TEXT,
+    python_version TEXT,
+    code_version TEXT,
+    argv TEXT
+);
+CREATE TABLE IF NOT EXISTS extraction_metrics (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    kind TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    method TEXT NOT NULL,
+    tables_extracted INTEGER,
+    extracted_text_length INTEGER,
+    extraction_time REAL,
+    memory_usage REAL,
+    cpu_usage REAL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_metrics_run ON extraction_metrics(run_id);
+CREATE INDEX IF NOT EXISTS idx_metrics_kind_method ON extraction_metrics(kind, method);
+CREATE INDEX IF NOT EXISTS idx_metrics_filename ON extraction_metrics(filename);
+CREATE TABLE IF NOT EXISTS esg_counts (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    folder TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    company TEXT,
+    year TEXT,
+    social_count INTEGER,
+    environmental_count INTEGER,
+    governance_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_counts_run ON esg_counts(run_id);
+CREATE INDEX IF NOT EXISTS idx_counts_company_year ON esg_counts(company, year);
+CREATE INDEX IF NOT EXISTS idx_counts_folder ON esg_counts(folder);
+"""
+
+# Store columns and the names used by the CSVs, Visualization.py and the dashboard
+METRIC_COLUMNS = {
+    'filename': 'Filename',
+    'method': 'Extraction Method',
+    'tables_extracted': 'tables_extracted',
+    'extracted_text_length': 'extracted_text_length',
+    'extraction_time': 'extraction_time',
+    'memory_usage': 'memory_usage',
+    'cpu_usage': 'cpu_usage',
+}
+COUNT_COLUMNS = {
+    'folder': 'Folder',
+    'filename': 'Filename',
+    'company': 'Company',
+    'year': 'Year',
+    'social_count': 'Social_Count',
+    'environmental_count': 'Environmental_Count',
+    'governance_count': 'Governance_Count',
+}
+
+# Connection of the current run per database in this process (key, connection)
+_run_connections = {}
+
+
+def connect(db_path=DEFAULT_DB):
+    """Open (and create if needed) the metrics database in WAL mode so concurrent writers don't block readers."""
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def run_connection(run_id, db_path=DEFAULT_DB):
+    """
+    Connection shared by every write of one run in this process.
+
+    The schema is applied once per run instead of once per row. Starting
+    another run on the same database closes the previous run's connection; a
+    pool worker opens its own, as sqlite connections must not cross processes.
+
+    Args:
+        run_id (str): Id from start_run.
+        db_path (str): Metrics database path.
+
+    Returns:
+        sqlite3.Connection: Open connection to the metrics database.
+    """
+    key = (os.getpid(), run_id)
+    cached = _run_connections.get(db_path)
+    if cached is None or cached[0] != key:
+        if cached is not None and cached[0][0] == os.getpid():
+            cached[1].close()
+        _run_connections[db_path] = (key, connect(db_path))
+    return _run_connections[db_path][1]
+
+
+def code_version():
+    """Short git commit of the checkout (with '+dirty' for local changes), or 'unknown'."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=here,
+                                capture_output=True, text=True, timeout=5).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=here,
+                               capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+    if not commit:
+        return 'unknown'
+    return commit + ('+dirty' if dirty else '')
+
+
+def start_run(kind, db_path=DEFAULT_DB):
+    """
+    Register a new run and return its id.
+
+    Args:
+        kind (str): What the run records, e.g. 'tables', 'text' or 'esg_counts'.
+        db_path (str): Metrics database path.
+
+    Returns:
+        str: The run id.
+    """
+    run_id = time.strftime('%Y%m%dT%H%M%S') + '-' + uuid.uuid4().hex[:8]
+    with run_connection(run_id, db_path) as conn:
+        conn.execute(
+            'INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (run_id, kind, time.time(), socket.gethostname(), platform.platform(),
+             platform.python_version(), code_version(), ' '.join(sys.argv))
+        )
+    return run_id
+
+
+def append_metric(run_id, kind, row, db_path=DEFAULT_DB):
+    """
+    Append one (pdf, method) performance row as soon as it is measured.
+
+    Args:
+        run_id (str): Id from start_run.
+        kind (str): 'tables' or 'text'.
+        row (dict): Row with the CSV column names ('Filename', 'Extraction Method', metrics...).
+        db_path (str): Metrics database path.
+    """
+    values = [row.get(column) for column in METRIC_COLUMNS.values()]
+    with run_connection(run_id, db_path) as conn:
+        conn.execute(
+            'INSERT INTO extraction_metrics (run_id, kind, ' + ', '.join(METRIC_COLUMNS) + ', recorded_at) '
+            'VALUES (?, ?, ' + ', '.join('?' * len(METRIC_COLUMNS)) + ', ?)',
+            [run_id, kind] + values + [time.time()]
+        )
+
+
+def append_esg_counts(run_id, rows, db_path=DEFAULT_DB):
+    """Append ESG count rows (CSV column names, including 'Company' and 'Year') for a run."""
+    with run_connection(run_id, db_path) as conn:
+        conn.executemany(
+            'INSERT INTO esg_counts (run_id, ' + ', '.join(COUNT_COLUMNS) + ') '
+            'VALUES (?, ' + ', '.join('?' * len(COUNT_COLUMNS)) + ')',
+            [[run_id] + [row.get(column) for column in COUNT_COLUMNS.values()] for row in rows]
+        )
+
+
+def _where(filters):
+    """Build a WHERE clause from (column, values) pairs, skipping empty filters."""
+    clauses, params = [], []
+    for column, values in filters:
+        if values is None:
+            continue
+        if isinstance(values, (list, tuple, set)):
+            values = list(values)
+            if not values:
+                clauses.append('0')
+                continue
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        else:
+            clauses.append(f"{column} = ?")
+            params.append(values)
+    return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+
+def query_metrics(db_path=DEFAULT_DB, kind='tables', methods=None, filenames=None, run_ids=None,
+                  latest_run=False, columns=None):
+    """
+    Load performance rows with the filters evaluated inside SQLite.
+
+    Args:
+        db_path (str): Metrics database path.
+        kind (str): 'tables' or 'text'.
+        methods (list, optional): Only these extraction methods.
+        filenames (list, optional): Only these PDFs.
+        run_ids (list, optional): Only these runs.
+        latest_run (bool): Only the most recent run of this kind.
+        columns (list, optional): Store columns to select (keys of METRIC_COLUMNS). Defaults to all.
+
+    Returns:
+        pd.DataFrame: Rows renamed to the CSV column names, plus 'run_id'.
+    """
+    columns = columns or list(METRIC_COLUMNS)
+    where, params = _where([('kind', kind), ('method', methods), ('filename', filenames), ('run_id', run_ids)])
+    if latest_run:
+        latest = "run_id = (SELECT run_id FROM runs WHERE kind = ? ORDER BY started_at DESC LIMIT 1)"
+        where = (where + ' AND ' + latest) if where else ' WHERE ' + latest
+        params.append(kind)
+
+    conn = connect(db_path)
+    try:
+        df = pd.read_sql_query(
+            f"SELECT run_id, {', '.join(columns)} FROM extraction_metrics{where} ORDER BY id", conn, params=params
+        )
+    finally:
+        conn.close()
+    return df.rename(columns=METRIC_COLUMNS)
+
+
+def query_esg_counts(db_path=DEFAULT_DB, companies=None, years=None, folders=None, latest_run=True):
+    """
+    Load ESG counts with company/year/folder filters evaluated inside SQLite.
+
+    Args:
+        db_path (str): Metrics database path.
+        companies (list, optional): Only these companies.
+        years (list, optional): Only these years.
+        folders (list, optional): Only these extraction folders (methods).
+        latest_run (bool): Only the most recent 'esg_counts' run.
+
+    Returns:
+        pd.DataFrame: Rows with the esg_counts.csv column names plus 'Company' and 'Year'.
+    """
+    where, params = _where([('company', companies), ('year', years), ('folder', folders)])
+    if latest_run:
+        latest = "run_id = (SELECT run_id FROM runs WHERE kind = 'esg_counts' ORDER BY started_at DESC LIMIT 1)"
+        where = (where + ' AND ' + latest) if where else ' WHERE ' + latest
+
+    conn = connect(db_path)
+    try:
+        df = pd.read_sql_query(f"SELECT {', '.join(COUNT_COLUMNS)} FROM esg_counts{where} ORDER BY id", conn, params=params)
+    finally:
+        conn.close()
+    return df.rename(columns=COUNT_COLUMNS)
+
+
+def metrics_version(db_path=DEFAULT_DB):
+    """Id of the newest metrics row; changes whenever a row is appended."""
+    conn = connect(db_path)
+    try:
+        return conn.execute('SELECT MAX(id) FROM extraction_metrics').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def list_runs(db_path=DEFAULT_DB, kind=None):
+    """All runs (optionally of one kind), newest first."""
+    where, params = _where([('kind', kind)])
+    conn = connect(db_path)
+    try:
+        return pd.read_sql_query(f"SELECT * FROM runs{where} ORDER BY started_at DESC", conn, params=params)
+    finally:
+        conn.close()
@@ -0,0 +1,196 @@
+import io
+import os
+import mmap
+import threading
+from collections import OrderedDict
+
+# PDFs kept mapped (and parsed by pdfplumber) per process. extract_tables runs
+# every backend on one PDF before moving on, so a small number is enough.
+MAX_CACHED_DOCUMENTS = 2
+
+# Parsed pages whose layout is kept per process; older layouts are flushed
+MAX_CACHED_PAGES = 256
+
+_documents = OrderedDict()
+_pages = OrderedDict()
+_lock = threading.RLock()
+
+
+class MappedPDF(io.RawIOBase):
+    """
+    Read-only file object over a memory-mapped PDF. Each view keeps its own position.
+
+    read() returns bytes, which copies the requested range out of the map:
+    pdfminer parses the chunks it reads with bytes methods that a memoryview
+    lacks. readinto() copies straight from the map into the caller's buffer.
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._buffer)
+        self._position = max(0, offset)
+        return self._position
+
+    def read(self, size=-1):
+        end = len(self._buffer) if size is None or size < 0 else min(len(self._buffer), self._position + size)
+        data = self._buffer[self._position:end]
+        self._position = max(self._position, end)
+        return data
+
+    def readinto(self, b):
+        end = min(len(self._buffer), self._position + len(b))
+        size = max(0, end - self._position)
+        # A released view, so the map can still be closed afterwards
+        with memoryview(self._buffer) as view:
+            b[:size] = view[self._position:self._position + size]
+        self._position += size
+        return size
+
+
+class _Document:
+    __slots__ = ('buffer', 'plumber', 'has_text')
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.plumber = None
+        # Page number -> whether it has characters, kept for pages whose layout was flushed
+        self.has_text = {}
+
+    def close(self):
+        if self.plumber is not None:
+            self.plumber.close()
+        self.buffer.close()
+
+
+def _cache_key(pdf_path):
+    """Identity of a PDF on disk; a rewritten file gets a new entry."""
+    stat = os.stat(pdf_path)
+    return os.path.abspath(pdf_path), stat.st_size, stat.st_mtime_ns
+
+
+def _document(pdf_path):
+    key = _cache_key(pdf_path)
+    with _lock:
+        if key in _documents:
+            _documents.move_to_end(key)
+            return _documents[key]
+        with open(pdf_path, 'rb') as f:
+            document = _Document(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        _documents[key] = document
+        while len(_documents) > MAX_CACHED_DOCUMENTS:
+            old_key, old = _documents.popitem(last=False)
+            for page_key in [page_key for page_key in _pages if page_key[0] == old_key]:
+                del _pages[page_key]
+            old.close()
+        return document
+
+
+def map_pdf(pdf_path):
+    """
+    Memory-map a PDF once per process and return a new file-like view of it.
+
+    The file is read from disk once, however many backends open it.
+
+    Args:
+        pdf_path (str): Path to the PDF.
+
+    Returns:
+        MappedPDF: Seekable, read-only binary file object.
+    """
+    return MappedPDF(_document(pdf_path).buffer)
+
+
+def open_plumber(pdf_path):
+    """The pdfplumber document of a PDF, parsed from the mapped file once per process."""
+    document = _document(pdf_path)
+    with _lock:
+        if document.plumber is None:
+            import pdfplumber
+            document.plumber = pdfplumber.open(MappedPDF(document.buffer))
+        return document.plumber
+
+
+def _keep_page(key, page_number, page):
+    with _lock:
+        _pages[(key, page_number)] = page
+        _pages.move_to_end((key, page_number))
+        while len(_pages) > MAX_CACHED_PAGES:
+            (old_key, old_number), old_page = _pages.popitem(last=False)
+            document = _documents.get(old_key)
+            if document is not None and getattr(old_page, '_layout', None) is not None:
+                document.has_text[old_number] = bool(old_page.chars)
+            # Drops the parsed layout; pdfplumber parses the page again if it is used later
+            old_page.flush_cache()
+
+
+def plumber_pages(pdf_path):
+    """
+    Yield (page_number, page) for every page of a PDF from the shared cache.
+
+    Pages parsed by one backend keep their pdfminer layout, so another backend
+    working on the same PDF in this process reuses it instead of parsing again.
+
+    Args:
+        pdf_path (str): Path to the PDF.
+
+    Yields:
+        tuple: 1-based page number and pdfplumber Page.
+    """
+    key = _cache_key(pdf_path)
+    for page_number, page in enumerate(open_plumber(pdf_path).pages, start=1):
+        _keep_page(key, page_number, page)
+        yield page_number, page
+
+
+def pages_with_text(pdf_path):
+    """
+    Page numbers that contain any characters, taken from cached layouts only.
+
+    Pages whose layout was flushed to stay under MAX_CACHED_PAGES keep the
+    answer recorded when they were flushed, so large reports are covered too.
+
+    Returns:
+        list or None: The pages with text, or None when some page has not been
+        parsed in this process yet (nothing is parsed to answer).
+    """
+    key = _cache_key(pdf_path)
+    with _lock:
+        document = _documents.get(key)
+        if document is None or document.plumber is None:
+            return None
+        pages = []
+        for page_number in range(1, len(document.plumber.pages) + 1):
+            has_text = document.has_text.get(page_number)
+            if has_text is None:
+                cached = _pages.get((key, page_number))
+                # pdfplumber stores the parsed pdfminer layout on the page as _layout
+                if cached is None or getattr(cached, '_layout', None) is None:
+                    return None
+                has_text = bool(cached.chars)
+            if has_text:
+                pages.append(page_number)
+        return pages
+
+
+def clear_cache():
+    """Unmap and forget every cached PDF of this process."""
+    with _lock:
+        _pages.clear()
+        while _documents:
+            _, document = _documents.popitem()
+            document.close()
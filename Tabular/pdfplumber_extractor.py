@@ -2,6 +2,8 @@ import os
 import pandas as pd
 from pathlib import Path
 from helper_functions import *
+from tracing import span
+from pdf_input import plumber_pages
 import pdfplumber
 
 def extract_with_pdfplumber(input_folder, output_folder="pdfplumber"):
@@ -31,7 +33,8 @@ def extract_with_pdfplumber(input_folder, output_folder="pdfplumber"):
                 table_count = 0  # Counter for the number of valid tables extracted
                 for page_number, page in enumerate(pdf.pages, start=1):
                     try:
-                        tables = page.extract_tables()  # Extract tables from the current page
+                        with span('pdfplumber.extract_tables', file=filename, page=page_number):
+                            tables = page.extract_tables()  # Extract tables from the current page
                         if not tables:  # Skip if no tables are found on the page
                             continue
                         
@@ -56,7 +59,8 @@ def extract_with_pdfplumber(input_folder, output_folder="pdfplumber"):
                                 output_csv_path = os.path.join(
                                     pdf_output_folder, f"page_{page_number}_table_{table_idx + 1}.csv"
                                 )
-                                cleaned_table.to_csv(output_csv_path, index=False)
+                                with span('csv_write'):
+                                    cleaned_table.to_csv(output_csv_path, index=False)
                                 table_count += 1
 
                             except Exception as e:
@@ -82,36 +86,43 @@ def extract_with_pdfplumber(input_folder, output_folder="pdfplumber"):
     return table_counts
 
 def extract_with_pdfplumber_single(pdf_path, output_folder="pdfplumber"):
-    """Extract tables from a single PDF using PDFPlumber."""
+    """Extract tables from a single PDF using PDFPlumber; errors propagate so the job ledger records and retries them."""
     Path(output_folder).mkdir(parents=True, exist_ok=True)
     pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
     pdf_output_folder = os.path.join(output_folder, pdf_name)
     Path(pdf_output_folder).mkdir(parents=True, exist_ok=True)
 
     table_count = 0
-
-    try:
-        # Open the PDF file and extract tables
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_number, page in enumerate(pdf.pages, start=1):
-                tables = page.extract_tables()
-                for table_idx, table in enumerate(tables):
-                    if table:
-                        df = pd.DataFrame(table[1:], columns=table[0])  # Use first row as header
-                        cleaned_table = clean_table(df)  # Apply cleaning step
-                        if cleaned_table is None:
-                            continue  # Skip saving if the table is invalid after cleaning
-
-                        output_csv_path = os.path.join(
-                            pdf_output_folder, f"page_{page_number}_table_{table_idx + 1}.csv"
-                        )
-                        cleaned_table.to_csv(output_csv_path, index=False)
-                        table_count += 1
-
-        print(f"Extracted {table_count} tables from {pdf_path}")
-
-    except Exception as e:
-        print(f"Failed to extract tables from {pdf_path}: {e}")
-        table_count = 0
+    table_index = []
+
+    # Pages come from the per-process cache, mapped from disk once and
+    # shared with the other backends running on this PDF
+    for page_number, page in plumber_pages(pdf_path):
+        with span('pdfplumber.extract_tables', file=os.path.basename(pdf_path), page=page_number):
+            found = page.find_tables()
+            tables = [table.extract() for table in found]
+        for table_idx, table in enumerate(tables):
+            if table:
+                df = pd.DataFrame(table[1:], columns=table[0])  # Use first row as header
+                cleaned_table = clean_table(df)  # Apply cleaning step
+                if cleaned_table is None:
+                    continue  # Skip saving if the table is invalid after cleaning
+
+                output_csv_path = os.path.join(
+                    pdf_output_folder, f"page_{page_number}_table_{table_idx + 1}.csv"
+                )
+                with span('csv_write'):
+                    cleaned_table.to_csv(output_csv_path, index=False)
+                table_count += 1
+
+                x0, top, x1, bottom = found[table_idx].bbox
+                table_index.append({
+                    'file': os.path.basename(output_csv_path),
+                    'page': page_number,
+                    'bbox': [x0 / page.width, top / page.height, x1 / page.width, bottom / page.height],
+                })
+
+    write_table_index(pdf_output_folder, table_index)
+    print(f"Extracted {table_count} tables from {pdf_path}")
 
     return {os.path.basename(pdf_path): table_count}
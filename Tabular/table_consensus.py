@@ -0,0 +1,315 @@
+import os
+import re
+import json
+import hashlib
+from collections import defaultdict
+from itertools import combinations
+from pathlib import Path
+
+import pandas as pd
+
+from helper_functions import TABLE_INDEX_FILE
+from tracing import traced
+
+# Folder each backend writes its per-PDF table folders to
+BACKEND_FOLDERS = {
+    "Tabula": "tabula",
+    "Camelot": "camelot",
+    "PDFPlumber": "pdfplumber",
+}
+
+# Minimum similarity for two tables to be treated as the same region
+MATCH_THRESHOLD = 0.5
+
+# Weight of the bbox overlap in the similarity when both tables have a location
+LOCATION_WEIGHT = 0.3
+
+# Cells present in more than this share of a PDF's tables (units, years, 'total')
+# are too common to propose candidate pairs
+COMMON_CELL_SHARE = 0.5
+
+# Tables a cell may appear in and still propose pairs, whatever the PDF size; a
+# bucket of n tables yields n * (n - 1) / 2 pairs, so this bounds the work per cell
+MAX_BUCKET_SIZE = 12
+
+_WHITESPACE = re.compile(r'\s+')
+_NUMBER = re.compile(r'^[-+]?\d+(\.\d+)?$')
+_PAGE_FILE = re.compile(r'^page_(\d+)_table_')
+_REGION_FILE = re.compile(r'^region_\d+\.csv$')
+
+
+def _normalize_cell(value):
+    value = _WHITESPACE.sub(' ', str(value)).strip().lower()
+    if value in ('', 'nan', 'none') or value.startswith('unnamed:'):
+        return ''
+    # fix_data_types may write 1,234 as 1234 or 1234.0 depending on the backend
+    number = value.replace(',', '')
+    if _NUMBER.match(number):
+        return repr(float(number))
+    return value
+
+
+def cell_fingerprints(df):
+    """Set of 64-bit hashes of the normalized, non-empty header and body cells of a table."""
+    values = list(df.columns) + df.values.ravel().tolist()
+    prints = set()
+    for value in values:
+        value = _normalize_cell(value)
+        if value:
+            prints.add(int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'little'))
+    return frozenset(prints)
+
+
+def load_backend_tables(pdf_name, backend_folders=None):
+    """
+    Load every table the backends saved for one PDF, with its location.
+
+    Args:
+        pdf_name (str): PDF file name without extension (the per-PDF folder name).
+        backend_folders (dict, optional): Backend name to output folder. Defaults to BACKEND_FOLDERS.
+
+    Returns:
+        tuple: (tables, backends) where tables is a list of dicts with 'backend', 'file',
+        'page', 'bbox', 'df' and 'prints', and backends lists the backends that ran on the PDF.
+    """
+    tables, backends = [], []
+    for backend, folder in (backend_folders or BACKEND_FOLDERS).items():
+        pdf_folder = os.path.join(folder, pdf_name)
+        if not os.path.isdir(pdf_folder):
+            continue
+        backends.append(backend)
+
+        index_path = os.path.join(pdf_folder, TABLE_INDEX_FILE)
+        if os.path.exists(index_path):
+            # Only the tables of the last run; CSVs an earlier run left behind are not listed
+            with open(index_path, 'r', encoding='utf-8') as f:
+                locations = {entry['file']: entry for entry in json.load(f)}
+            filenames = sorted(locations)
+        else:
+            # Backends without an index (Tabula) own every CSV in the folder
+            locations = {}
+            filenames = sorted(name for name in os.listdir(pdf_folder) if name.endswith('.csv'))
+
+        for filename in filenames:
+            df = pd.read_csv(os.path.join(pdf_folder, filename), dtype=str, keep_default_na=False)
+            location = locations.get(filename, {})
+            page = location.get('page')
+            if page is None and _PAGE_FILE.match(filename):
+                page = int(_PAGE_FILE.match(filename).group(1))
+            tables.append({
+                'backend': backend,
+                'file': os.path.join(pdf_folder, filename),
+                'page': page,
+                'bbox': location.get('bbox'),
+                'df': df,
+                'prints': cell_fingerprints(df),
+            })
+    return tables, backends
+
+
+def _overlap(a, b):
+    """Intersection over union of two [x0, top, x1, bottom] boxes."""
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    intersection = width * height
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def table_similarity(a, b):
+    """Content (Jaccard of cell fingerprints) and, when both are known, location similarity of two tables."""
+    if a['page'] is not None and b['page'] is not None and a['page'] != b['page']:
+        return 0.0
+    if not a['prints'] or not b['prints']:
+        return 0.0
+    content = len(a['prints'] & b['prints']) / len(a['prints'] | b['prints'])
+    if a['bbox'] and b['bbox']:
+        return (1 - LOCATION_WEIGHT) * content + LOCATION_WEIGHT * _overlap(a['bbox'], b['bbox'])
+    return content
+
+
+def candidate_pairs(tables):
+    """
+    Pairs of tables from different backends that share at least one distinctive cell.
+
+    Tables are bucketed by cell fingerprint, so only tables with common content
+    are compared instead of every pair across backends. Buckets larger than
+    COMMON_CELL_SHARE of the tables or MAX_BUCKET_SIZE are skipped, which keeps
+    the number of pairs linear in the number of distinct cells.
+    """
+    buckets = defaultdict(list)
+    for i, table in enumerate(tables):
+        for fingerprint in table['prints']:
+            buckets[fingerprint].append(i)
+
+    # A cell shared by one table per backend is exactly what a matching region looks like
+    max_bucket = max(len({table['backend'] for table in tables}),
+                     min(int(COMMON_CELL_SHARE * len(tables)), MAX_BUCKET_SIZE))
+    pairs = set()
+    for members in buckets.values():
+        if len(members) > max_bucket:
+            continue
+        for i, j in combinations(members, 2):
+            if tables[i]['backend'] != tables[j]['backend']:
+                pairs.add((i, j))
+    return pairs
+
+
+def cluster_tables(tables):
+    """
+    Group tables into regions, with at most one table per backend in each region.
+
+    Candidate pairs are merged greedily from the most to the least similar.
+
+    Returns:
+        tuple: (regions, similarities) where regions is a list of lists of table
+        indices and similarities maps the scored index pairs to their similarity.
+    """
+    similarities = {pair: table_similarity(tables[pair[0]], tables[pair[1]]) for pair in candidate_pairs(tables)}
+
+    parent = list(range(len(tables)))
+    members = {i: {tables[i]['backend']} for i in range(len(tables))}
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for (i, j), score in sorted(similarities.items(), key=lambda item: -item[1]):
+        if score < MATCH_THRESHOLD:
+            break
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j or members[root_i] & members[root_j]:
+            continue
+        parent[root_j] = root_i
+        members[root_i] |= members.pop(root_j)
+
+    regions = defaultdict(list)
+    for i in range(len(tables)):
+        regions[find(i)].append(i)
+    return list(regions.values()), similarities
+
+
+def merge_region(tables, region, similarities):
+    """
+    Pick the table agreeing most with the others of its region and fill its blank cells.
+
+    Blank cells of the chosen table are filled from same-shaped tables of the
+    region when they all agree on the value.
+
+    Returns:
+        tuple: (best index, merged DataFrame, similarity of the best table to each other member)
+    """
+    def score(i, j):
+        return similarities.get((min(i, j), max(i, j)), 0.0) if i != j else 0.0
+
+    best = max(region, key=lambda i: (sum(score(i, j) for j in region), len(tables[i]['prints'])))
+    merged = tables[best]['df'].copy()
+    same_shape = [tables[i]['df'] for i in region if i != best and tables[i]['df'].shape == merged.shape]
+    if same_shape:
+        values = merged.values
+        blank = values == ''
+        for row, col in zip(*blank.nonzero()):
+            candidates = {other.iat[row, col] for other in same_shape if other.iat[row, col] != ''}
+            if len(candidates) == 1:
+                values[row, col] = candidates.pop()
+        merged = pd.DataFrame(values, columns=merged.columns)
+    return best, merged, {tables[j]['backend']: score(best, j) for j in region if j != best}
+
+
+@traced('consensus.pdf')
+def consensus_for_pdf(pdf_name, backend_folders=None, output_folder='consensus'):
+    """
+    Write one merged table per detected region of a PDF.
+
+    Args:
+        pdf_name (str): PDF file name without extension.
+        backend_folders (dict, optional): Backend name to output folder. Defaults to BACKEND_FOLDERS.
+        output_folder (str): Folder receiving '<pdf_name>/region_<n>.csv'.
+
+    Returns:
+        list: One summary row per region.
+    """
+    # Regions of an earlier run are removed, so a rerun with fewer regions leaves no stale files
+    pdf_output_folder = os.path.join(output_folder, pdf_name)
+    if os.path.isdir(pdf_output_folder):
+        for filename in os.listdir(pdf_output_folder):
+            if _REGION_FILE.match(filename):
+                os.remove(os.path.join(pdf_output_folder, filename))
+
+    tables, backends = load_backend_tables(pdf_name, backend_folders)
+    if not tables:
+        return []
+
+    regions, similarities = cluster_tables(tables)
+    # Order regions by page and vertical position, tables without a location last
+    regions.sort(key=lambda region: min(
+        (tables[i]['page'] is None, tables[i]['page'] or 0, (tables[i]['bbox'] or [0, 0])[1]) for i in region
+    ))
+
+    Path(pdf_output_folder).mkdir(parents=True, exist_ok=True)
+    rows = []
+    for number, region in enumerate(regions, 1):
+        best, merged, agreement = merge_region(tables, region, similarities)
+        output_path = os.path.join(pdf_output_folder, f"region_{number}.csv")
+        merged.to_csv(output_path, index=False)
+
+        pages = [tables[i]['page'] for i in region if tables[i]['page'] is not None]
+        rows.append({
+            'PDF': pdf_name,
+            'Region': number,
+            'Page': pages[0] if pages else None,
+            'Backends': '+'.join(sorted(tables[i]['backend'] for i in region)),
+            'Best Backend': tables[best]['backend'],
+            # Mean similarity of the chosen table to every other backend that ran (missing = 0)
+            'Agreement': sum(agreement.values()) / (len(backends) - 1) if len(backends) > 1 else 1.0,
+            'Rows': merged.shape[0],
+            'Columns': merged.shape[1],
+            'Source Files': ';'.join(tables[i]['file'] for i in region),
+            'Output File': output_path,
+        })
+    return rows
+
+
+def build_consensus(pdf_names=None, backend_folders=None, output_folder='consensus'):
+    """
+    Deduplicate the tables of all backends into one best table per region.
+
+    Args:
+        pdf_names (list, optional): PDF names (without extension). Defaults to every
+            per-PDF folder found in the backend folders.
+        backend_folders (dict, optional): Backend name to output folder. Defaults to BACKEND_FOLDERS.
+        output_folder (str): Folder for the merged tables and consensus_summary.csv.
+
+    Returns:
+        pd.DataFrame: One row per region with its backends, agreement score and files.
+    """
+    backend_folders = backend_folders or BACKEND_FOLDERS
+    if pdf_names is None:
+        pdf_names = sorted({
+            name for folder in backend_folders.values() if os.path.isdir(folder)
+            for name in os.listdir(folder) if os.path.isdir(os.path.join(folder, name))
+        })
+
+    rows = []
+    for pdf_name in pdf_names:
+        rows.extend(consensus_for_pdf(pdf_name, backend_folders, output_folder))
+
+    summary = pd.DataFrame(rows)
+    Path(output_folder).mkdir(parents=True, exist_ok=True)
+    summary_path = os.path.join(output_folder, 'consensus_summary.csv')
+    summary.to_csv(summary_path, index=False)
+
+    if rows:
+        source_tables = sum(len(row['Source Files'].split(';')) for row in rows)
+        print(f"Merged {source_tables} backend tables into {len(rows)} regions "
+              f"(mean agreement {summary['Agreement'].mean():.2f}); summary saved to {summary_path}")
+    return summary
+
+
+if __name__ == "__main__":
+    consensus = build_consensus()
+    print(consensus)
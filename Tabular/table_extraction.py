@@ -1,13 +1,31 @@
 import os
+import importlib
 import pandas as pd
 import time
 import psutil
 import threading
+from functools import partial
 from pathlib import Path
-from helper_functions import *
-from tabula_extractor import *
-from camelot_extractor import *
-from pdfplumber_extractor import *
+from tracing import span
+from metrics_store import DEFAULT_DB, append_metric, start_run
+from job_ledger import (DEFAULT_LEDGER, DONE, FAILED, MAX_ATTEMPTS, batch_jobs, batch_run_id, batch_summary,
+                        job_key, open_batch, run_with_retries)
+
+# Backends are imported only when selected: tabula starts a JVM bridge and
+# camelot/pdfplumber pull in their whole parsing stacks. Backends run on each
+# PDF in this order: PDFPlumber goes before Camelot so Camelot can reuse the
+# page layouts it leaves in the pdf_input cache.
+EXTRACTION_BACKENDS = {
+    "Tabula": ("tabula_extractor", "extract_with_tabula_single"),
+    "PDFPlumber": ("pdfplumber_extractor", "extract_with_pdfplumber_single"),
+    "Camelot": ("camelot_extractor", "extract_with_camelot_single"),
+}
+
+
+def load_backend(method_name):
+    """Import a backend module on first use and return its single-file extraction function."""
+    module_name, function_name = EXTRACTION_BACKENDS[method_name]
+    return getattr(importlib.import_module(module_name), function_name)
 
 
 def measure_extraction_performance_parallel(extraction_func, pdf_file):
@@ -29,62 +47,114 @@ def measure_extraction_performance_parallel(extraction_func, pdf_file):
     monitor_thread = threading.Thread(target=monitor_performance)
     monitor_thread.start()
 
+    # Errors reach the job ledger after monitoring stops
     start_time = time.time()
     try:
-        table_counts = extraction_func(pdf_file)
-    except Exception as e:
-        print(f"Error during extraction: {str(e)}")
-        table_counts = {}
-
-    metrics['extraction_time'] = time.time() - start_time
-
-    stop_event.set()
-    monitor_thread.join()
+        with span('extract_pdf', file=os.path.basename(pdf_file), method=extraction_func.__name__):
+            table_counts = extraction_func(pdf_file)
+    finally:
+        metrics['extraction_time'] = time.time() - start_time
+        stop_event.set()
+        monitor_thread.join()
 
     return table_counts, metrics
 
-def extract_tables(input_folder, performance_file="table_extraction_performance.csv"):
-    """Extract tables from individual PDFs with performance tracking."""
+def extract_tables(input_folder, performance_file="table_extraction_performance.csv", methods=None,
+                   metrics_db=DEFAULT_DB, resume=False, ledger_db=DEFAULT_LEDGER, max_attempts=MAX_ATTEMPTS):
+    """Extract tables from individual PDFs with performance tracking.
+
+    Every (pdf, backend) pair is a job in the ledger. With resume=True a
+    restarted batch only runs the jobs that are not done yet, and several
+    workers on one machine can process the same folder at once. Failed jobs
+    are retried up to max_attempts times. Every row is appended to the metrics
+    store as soon as it completes. The CSV is still written at the end for
+    compatibility and includes the rows of jobs finished by earlier runs.
+
+    Args:
+        input_folder (str): Folder containing the PDFs.
+        performance_file (str): Name of the CSV written to performance_metrics/.
+        methods (list, optional): Backends to run (keys of EXTRACTION_BACKENDS). Defaults to all.
+        metrics_db (str, optional): SQLite metrics store; None disables it.
+        resume (bool): Continue the ledger of a previous run instead of starting over.
+        ledger_db (str): SQLite job ledger.
+        max_attempts (int): Attempts per job before it stays failed.
+    """
     performance_results = []
     input_path = Path(input_folder)
 
     if not input_path.exists():
         raise ValueError(f"Input folder not found: {input_folder}")
 
+    unknown = set(methods or []) - set(EXTRACTION_BACKENDS)
+    if unknown:
+        raise ValueError(f"Unknown extraction methods: {sorted(unknown)}")
+
     extraction_methods = [
-        ("Tabula", extract_with_tabula_single),
-        ("Camelot", extract_with_camelot_single),
-        ("PDFPlumber", extract_with_pdfplumber_single)
+        (method_name, load_backend(method_name))
+        for method_name in EXTRACTION_BACKENDS
+        if methods is None or method_name in methods
     ]
 
-    for pdf_file in input_path.glob("*.pdf"):
-        for method_name, extraction_func in extraction_methods:
-            try:
-                table_counts, metrics = measure_extraction_performance_parallel(
-                    extraction_func, 
-                    str(pdf_file)
-                )
-                
-                for filename, table_count in table_counts.items():
-                    performance_results.append({
-                        'Filename': filename,
-                        'Extraction Method': method_name,
-                        'tables_extracted': table_count,
-                        **metrics
-                    })
-                    print(f"{filename} processed successfully with {method_name}")
-                    print(f"Tables extracted: {table_count}")
-
-            except Exception as e:
-                print(f"Error processing {pdf_file.name} with {method_name}: {str(e)}")
-                performance_results.append({
-                    'Filename': pdf_file.name,
-                    'Extraction Method': method_name,
-                    'extraction_time': 0,
-                    'memory_usage': 0,
-                    'cpu_usage': 0,
-                    'tables_extracted': 0
-                })
+    def run_job(pdf_file, method_name, extraction_func):
+        table_counts, metrics = measure_extraction_performance_parallel(
+            extraction_func, 
+            str(pdf_file)
+        )
+        if not table_counts:
+            raise RuntimeError(f"{method_name} returned no result")
+
+        rows = []
+        for filename, table_count in table_counts.items():
+            rows.append({
+                'Filename': filename,
+                'Extraction Method': method_name,
+                'tables_extracted': table_count,
+                **metrics
+            })
+            if run_id:
+                append_metric(run_id, 'tables', rows[-1], metrics_db)
+            print(f"{filename} processed successfully with {method_name}")
+            print(f"Tables extracted: {table_count}")
+        return rows
+
+    batch = f"tables:{input_path.resolve()}"
+    jobs = {
+        job_key(pdf_file, method_name): (pdf_file, method_name, extraction_func)
+        for pdf_file in sorted(input_path.glob("*.pdf"))
+        for method_name, extraction_func in extraction_methods
+    }
+    run_id = None
+    if metrics_db:
+        # A resumed batch keeps appending to the metrics run it started
+        run_id = (resume and batch_run_id(batch, ledger_db)) or start_run('tables', metrics_db)
+    open_batch(batch, list(jobs), resume=resume, run_id=run_id, db_path=ledger_db)
+    attempts_before = {key: state['attempts'] for key, state in batch_jobs(batch, ledger_db).items()}
+
+    for key, job in jobs.items():
+        run_with_retries(batch, key, partial(run_job, *job), max_attempts, ledger_db)
+
+    for key, state in batch_jobs(batch, ledger_db).items():
+        if key not in jobs:
+            continue
+        pdf_file, method_name, _ = jobs[key]
+        if state['status'] == DONE:
+            performance_results.extend(state['result'])
+        elif state['status'] == FAILED:
+            print(f"Error processing {pdf_file.name} with {method_name}: {state['last_error']}")
+            error_row = {
+                'Filename': pdf_file.name,
+                'Extraction Method': method_name,
+                'extraction_time': 0,
+                'memory_usage': 0,
+                'cpu_usage': 0,
+                'tables_extracted': 0
+            }
+            performance_results.append(error_row)
+            # Failures recorded by an earlier invocation of a resumed run are already in the store
+            if run_id and state['attempts'] != attempts_before.get(key):
+                append_metric(run_id, 'tables', error_row, metrics_db)
+
+    print(f"Job ledger: {batch_summary(batch, ledger_db)}")
 
     output_dir = Path("performance_metrics")
     output_dir.mkdir(exist_ok=True)
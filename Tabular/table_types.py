@@ -0,0 +1,156 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Values looked at per column before choosing its type
+SAMPLE_SIZE = 32
+
+# Distinct header rows whose normalized names are kept; extracted tables of one
+# report (and of the three backends) mostly repeat a handful of headers
+HEADER_CACHE_SIZE = 4096
+
+# Header clean-up applied by standardize_headers, in order
+_HEADER_CONTROL = re.compile(r'[\n\r\t]')
+_HEADER_SPACES = re.compile(r'\s+')
+_HEADER_INVALID = re.compile(r'[^a-z0-9_]')
+
+# Currency symbols and thousands separators removed before numeric conversion
+_CURRENCY = re.compile(r'[,$€£]')
+
+# Strings the converters read as missing instead of rejecting
+NUMERIC_MISSING = frozenset([''])
+DATE_MISSING = frozenset(['', 'NaT', 'nat', 'NAT', 'nan', 'NaN', 'NAN'])
+
+# Everything pd.to_numeric parses from a string
+_NUMERIC = re.compile(r'(?:\s*(?:[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|[-+]?inf(?:inity)?)\s*)?', re.IGNORECASE)
+
+# Candidates for pd.to_datetime(format='%Y-%m-%d'), which also takes unpadded months and days
+_DATE = re.compile(r'\d{4}-\d{1,2}-\d{1,2}')
+
+NUMERIC, DATE, TEXT = 'numeric', 'date', 'text'
+
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def normalize_header(name):
+    """Lower-case, underscore-separated form of one header ('Scope 1\\n(tCO2e)' -> 'scope_1_tco2e')."""
+    name = name.strip().lower()
+    name = _HEADER_CONTROL.sub(' ', name)
+    name = _HEADER_SPACES.sub('_', name)
+    return _HEADER_INVALID.sub('', name)
+
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def _normalize_header_row(names):
+    seen = {}
+    new_cols = []
+    for col in map(normalize_header, names):
+        # Handle duplicate column names
+        if col in seen:
+            seen[col] += 1
+            new_cols.append(f"{col}_{seen[col]}")
+        else:
+            seen[col] = 0
+            new_cols.append(col)
+    return tuple(new_cols)
+
+
+def normalize_headers(columns):
+    """
+    Normalized, de-duplicated column names for a table.
+
+    Results are cached per header row, so tables with identical headers are
+    normalized once per process.
+
+    Args:
+        columns (iterable): Original column labels.
+
+    Returns:
+        list: New column names, repeated names suffixed '_1', '_2', ...
+    """
+    return list(_normalize_header_row(tuple(str(col) for col in columns)))
+
+
+def is_text_column(series):
+    """True for object columns, the only ones converted (string-dtype columns are left as they are)."""
+    return series.dtype == object
+
+
+def _is_missing(value):
+    return value is None or value is pd.NA or (isinstance(value, float) and value != value)
+
+
+def sample_values(values, size=SAMPLE_SIZE):
+    """Up to size non-missing values spread evenly over a column, first and last included."""
+    if len(values) > size:
+        values = values[np.linspace(0, len(values) - 1, size).astype(int)]
+    return [value for value in values if not _is_missing(value)]
+
+
+def infer_column_type(values, size=SAMPLE_SIZE):
+    """
+    Choose the type of a text column from a sample of its values.
+
+    Args:
+        values (np.ndarray): Column values (object array).
+        size (int): Number of values sampled.
+
+    Returns:
+        str: NUMERIC when every sampled value is a number once currency symbols and
+        commas are removed, DATE when every value is a YYYY-MM-DD date, TEXT otherwise.
+    """
+    sample = sample_values(values, size)
+    # Non-string cells turn into NaN when the column is cleaned, like str.replace does
+    strings = [value for value in sample if isinstance(value, str)]
+    if all(_NUMERIC.fullmatch(_CURRENCY.sub('', value)) for value in strings):
+        return NUMERIC
+    if len(strings) == len(sample) and all(value in DATE_MISSING or _DATE.fullmatch(value) for value in strings):
+        return DATE
+    return TEXT
+
+
+def _complete(converted, source, missing):
+    """True when the conversion lost no value other than the strings read as missing."""
+    lost = np.flatnonzero(pd.isna(converted))
+    return all(_is_missing(source[i]) or source[i] in missing for i in lost)
+
+
+def convert_column(series, size=SAMPLE_SIZE):
+    """
+    Convert a text column to numbers or dates in a single pass.
+
+    The type is decided on a sample, then the whole column is converted once
+    with errors='coerce'. If that turns any real value into NaN (a value the
+    sample missed) the column is returned unchanged, so the result matches
+    trying pd.to_numeric and pd.to_datetime and catching their errors.
+
+    Args:
+        series (pd.Series): Column to convert.
+        size (int): Number of values sampled.
+
+    Returns:
+        pd.Series: Numeric or datetime column, or the original column.
+    """
+    if not is_text_column(series):
+        return series
+
+    values = series.to_numpy(dtype=object)
+    column_type = infer_column_type(values, size)
+    if column_type == NUMERIC:
+        # Remove currency symbols and commas
+        cleaned = np.array([_CURRENCY.sub('', value) if isinstance(value, str) else np.nan for value in values],
+                           dtype=object)
+        converted = pd.to_numeric(cleaned, errors='coerce')
+        if _complete(converted, cleaned, NUMERIC_MISSING):
+            return pd.Series(converted, index=series.index, name=series.name)
+    elif column_type == DATE:
+        converted = pd.to_datetime(series, format="%Y-%m-%d", errors='coerce')
+        if _complete(converted.to_numpy(), values, DATE_MISSING):
+            return converted
+    return series
+
+
+def header_cache_info():
+    """Hit and miss counts of the header caches of this process."""
+    return {'headers': normalize_header.cache_info(), 'header_rows': _normalize_header_row.cache_info()}
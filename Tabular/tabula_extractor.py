@@ -2,6 +2,7 @@ import os
 import tabula
 import pandas as pd
 from helper_functions import *
+from tracing import span
 from pathlib import Path
 
 def extract_with_tabula(input_folder, output_folder='tabula'):
@@ -20,7 +21,8 @@ def extract_with_tabula(input_folder, output_folder='tabula'):
         
         try:
             # Read tables using Tabula
-            tables = tabula.read_pdf(pdf_path, pages='all', multiple_tables=True)
+            with span('tabula.read_pdf', file=filename):
+                tables = tabula.read_pdf(pdf_path, pages='all', multiple_tables=True)
             valid_tables = []
             
             for i, table in enumerate(tables):
@@ -36,7 +38,8 @@ def extract_with_tabula(input_folder, output_folder='tabula'):
                         
                         # Save the cleaned table to CSV
                         output_path = os.path.join(pdf_output_folder, f"table_{i + 1}.csv")
-                        cleaned_table.to_csv(output_path, index=False)
+                        with span('csv_write'):
+                            cleaned_table.to_csv(output_path, index=False)
                 except Exception as e:
                     print(f"Error processing table {i + 1} in {filename}: {str(e)}")
             
@@ -58,34 +61,36 @@ def extract_with_tabula(input_folder, output_folder='tabula'):
     return table_counts
 
 def extract_with_tabula_single(pdf_path, output_folder='tabula'):
-    """Extract tables from a single PDF using Tabula."""
+    """Extract tables from a single PDF using Tabula; errors propagate so the job ledger records and retries them."""
     Path(output_folder).mkdir(parents=True, exist_ok=True)
     pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
     pdf_output_folder = os.path.join(output_folder, pdf_name)
     Path(pdf_output_folder).mkdir(exist_ok=True)
 
-    table_counts = 0  # To keep track of valid tables extracted
-
-    try:
-        # Read all tables from the specified PDF file
+    # Read all tables from the specified PDF file
+    with span('tabula.read_pdf', file=os.path.basename(pdf_path)):
         tables = tabula.read_pdf(pdf_path, pages='all', multiple_tables=True)
-        valid_tables = []
+    valid_tables = []
 
-        # Process and clean each table
-        for table in tables:
-            cleaned_table = clean_table(table)
-            if cleaned_table is not None:
-                valid_tables.append(cleaned_table)
+    # Process and clean each table
+    for table in tables:
+        cleaned_table = clean_table(table)
+        if cleaned_table is not None:
+            valid_tables.append(cleaned_table)
 
-        # Save valid tables to output files
-        for i, table in enumerate(valid_tables, 1):
-            output_path = os.path.join(pdf_output_folder, f"table_{i}.csv")
+    # Save valid tables to output files
+    for i, table in enumerate(valid_tables, 1):
+        output_path = os.path.join(pdf_output_folder, f"table_{i}.csv")
+        with span('csv_write'):
             table.to_csv(output_path, index=False)
 
-        table_counts = len(valid_tables)
-        print(f"{pdf_path} processed successfully. Tables extracted: {table_counts}")
+    # tabula-py does not report pages for multiple_tables output, so the
+    # consensus stage matches Tabula tables by content only
+    write_table_index(pdf_output_folder, [
+        {'file': f"table_{i}.csv", 'page': None, 'bbox': None} for i in range(1, len(valid_tables) + 1)
+    ])
 
-    except Exception as e:
-        print(f"Error processing {pdf_path}: {str(e)}")
+    table_counts = len(valid_tables)
+    print(f"{pdf_path} processed successfully. Tables extracted: {table_counts}")
 
     return {os.path.basename(pdf_path): table_counts}
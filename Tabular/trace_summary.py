@@ -0,0 +1,81 @@
+import sys
+import glob
+from collections import defaultdict
+
+import pandas as pd
+
+from tracing import load_trace_events
+
+
+def self_times(events):
+    """
+    Compute the exclusive (self) time of every span.
+
+    Spans of one thread are nested by start and end time; a span's self time
+    is its duration minus the time spent in its direct children.
+
+    Args:
+        events (list): Complete ('X') trace events.
+
+    Returns:
+        list: Self time in microseconds, aligned with events.
+    """
+    result = [event['dur'] for event in events]
+    by_thread = defaultdict(list)
+    for idx, event in enumerate(events):
+        by_thread[(event['pid'], event['tid'])].append(idx)
+
+    for indices in by_thread.values():
+        indices.sort(key=lambda i: (events[i]['ts'], -events[i]['dur']))
+        stack = []
+        for idx in indices:
+            start = events[idx]['ts']
+            while stack and events[stack[-1]]['ts'] + events[stack[-1]]['dur'] <= start:
+                stack.pop()
+            if stack:
+                result[stack[-1]] -= events[idx]['dur']
+            stack.append(idx)
+    return result
+
+
+def summarize_traces(paths):
+    """
+    Rank the hottest spans across one or more trace files.
+
+    Args:
+        paths (list): Trace files written by tracing.py (glob patterns allowed).
+
+    Returns:
+        pd.DataFrame: One row per span name, sorted by total self time.
+    """
+    events = []
+    for pattern in paths:
+        for path in sorted(glob.glob(pattern)):
+            events.extend(event for event in load_trace_events(path) if event.get('ph') == 'X')
+
+    if not events:
+        return pd.DataFrame(columns=['name', 'count', 'total_s', 'self_s', 'mean_ms', 'max_ms', 'self_share'])
+
+    df = pd.DataFrame({
+        'name': [event['name'] for event in events],
+        'dur': [event['dur'] for event in events],
+        'self': self_times(events),
+    })
+    summary = df.groupby('name').agg(
+        count=('dur', 'size'),
+        total_s=('dur', 'sum'),
+        self_s=('self', 'sum'),
+        mean_ms=('dur', 'mean'),
+        max_ms=('dur', 'max'),
+    )
+    summary[['total_s', 'self_s']] /= 1e6
+    summary[['mean_ms', 'max_ms']] /= 1e3
+    summary['self_share'] = summary['self_s'] / summary['self_s'].sum()
+    return summary.sort_values('self_s', ascending=False).reset_index().round(4)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python trace_summary.py <trace files or patterns>...")
+        sys.exit(1)
+    print(summarize_traces(sys.argv[1:]).to_string(index=False))
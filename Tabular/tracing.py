@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import atexit
+import threading
+from contextlib import nullcontext
+from functools import wraps
+
+# Tracing is off unless ESG_TRACE names an output file or enable_tracing() is called.
+# A '.jsonl' path gets one JSON event per line; any other path gets a Chrome trace
+# (load it in chrome://tracing or Perfetto). Each process writes its own file,
+# '<name>.<pid><ext>', so pool workers never contend on one file.
+_enabled = False
+_trace_path = None
+_events = []
+_lock = threading.Lock()
+_null_span = nullcontext()
+
+# Events kept in memory before they are flushed to disk
+FLUSH_EVERY = 10000
+
+
+class _Span:
+    """Context manager recording one complete ('X') trace event."""
+
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        event = {
+            'name': self.name,
+            'ph': 'X',
+            'ts': self.start / 1000,
+            'dur': (end - self.start) / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+        }
+        if self.args:
+            event['args'] = self.args
+        if exc_type is not None:
+            event.setdefault('args', {})['error'] = exc_type.__name__
+        with _lock:
+            _events.append(event)
+            should_flush = len(_events) >= FLUSH_EVERY
+        if should_flush:
+            flush_trace()
+        return False
+
+
+def span(name, **args):
+    """
+    Time a block of code as a named span.
+
+    Returns a shared no-op context manager when tracing is disabled, so
+    instrumented code pays only for one function call and a flag check.
+
+    Args:
+        name (str): Span name, e.g. 'camelot.read_pdf'.
+        **args: Extra values stored with the event (file, page, ...).
+    """
+    if not _enabled:
+        return _null_span
+    return _Span(name, args)
+
+
+def traced(name=None):
+    """Decorator wrapping every call of a function in a span."""
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(span_name, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def process_trace_path(path=None, pid=None):
+    """Per-process output file for a trace path."""
+    root, ext = os.path.splitext(path or _trace_path)
+    return f"{root}.{pid or os.getpid()}{ext or '.json'}"
+
+
+def enable_tracing(path):
+    """Start recording spans; they are written under path (see process_trace_path)."""
+    global _enabled, _trace_path
+    _trace_path = path
+    _enabled = True
+    # Worker processes inherit the setting through the environment
+    os.environ['ESG_TRACE'] = path
+
+
+def disable_tracing():
+    global _enabled
+    flush_trace()
+    _enabled = False
+    os.environ.pop('ESG_TRACE', None)
+
+
+def tracing_enabled():
+    return _enabled
+
+
+def flush_trace():
+    """Write buffered events to this process's trace file."""
+    # The lock is held through the write so two threads cannot both start the array
+    with _lock:
+        events = _events[:]
+        _events.clear()
+        if not events or _trace_path is None:
+            return
+
+        path = process_trace_path()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        lines = ''.join(json.dumps(event) + (',\n' if not path.endswith('.jsonl') else '\n') for event in events)
+        with open(path, 'a', encoding='utf-8') as f:
+            if not path.endswith('.jsonl') and f.tell() == 0:
+                # Chrome's JSON array format allows the closing bracket to be omitted,
+                # so events can be appended without rewriting the file
+                lines = '[\n' + lines
+            f.write(lines)
+
+
+def load_trace_events(path):
+    """Read the events of one trace file in either format."""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            return [json.loads(line) for line in f if line.strip()]
+        text = f.read().strip()
+    if text.startswith('['):
+        text = text.rstrip(',]').rstrip().rstrip(',') + ']'
+    data = json.loads(text)
+    return data['traceEvents'] if isinstance(data, dict) else data
+
+
+atexit.register(flush_trace)
+# Forked workers must not re-write the events buffered by their parent
+os.register_at_fork(after_in_child=_events.clear)
+
+if os.environ.get('ESG_TRACE'):
+    enable_tracing(os.environ['ESG_TRACE'])
@@ -1,14 +1,19 @@
 from flask import Flask
 import dash
-from dash import dcc, html, Input, Output
+from dash import dcc, html, Input, Output, State
 import dash_bootstrap_components as dbc
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import re
+import os
 
-# Load data
-data = pd.read_csv('esg_counts.csv')
+import tabular_path  # noqa: F401 (makes the Tabular modules importable)
+from metrics_store import DEFAULT_DB, query_esg_counts
+from segment_index import DEFAULT_INDEX_DB, search
+
+# Sentences listed when a heatmap cell is clicked
+DRILLDOWN_LIMIT = 200
 
 # Extract year and company name from filename
 def create_alias(filename):
@@ -21,11 +26,79 @@ def create_alias(filename):
     else:
         return filename, filename, None
 
-# Apply the function and create new columns
-data[['Alias', 'Company', 'Year']] = pd.DataFrame(
-    data['Filename'].apply(create_alias).tolist(), 
-    columns=['Alias', 'Company', 'Year']
-)
+def load_counts(companies=None, years=None, folders=None):
+    """
+    Load ESG counts, filtered by company, year and method.
+
+    Reads the latest run from the metrics store when it exists (the filters run
+    inside SQLite on indexed columns) and falls back to esg_counts.csv when the
+    store has no matching counts, e.g. when it only holds extraction metrics.
+    """
+    if os.path.exists(DEFAULT_DB):
+        counts = query_esg_counts(DEFAULT_DB, companies=companies, years=years, folders=folders)
+        counts["Alias"] = counts["Company"] + " " + counts["Year"].fillna("")
+        counts.loc[counts["Year"].isna(), "Alias"] = counts["Filename"]
+        if not counts.empty or not os.path.exists('esg_counts.csv'):
+            return counts
+
+    counts = pd.read_csv('esg_counts.csv')
+    # Apply the function and create new columns
+    counts[['Alias', 'Company', 'Year']] = pd.DataFrame(
+        counts['Filename'].apply(create_alias).tolist(), 
+        columns=['Alias', 'Company', 'Year']
+    )
+    if companies is not None:
+        counts = counts[counts["Company"].isin(companies)]
+    if years is not None:
+        counts = counts[counts["Year"].isin(years)]
+    if folders is not None:
+        counts = counts[counts["Folder"].isin(folders)]
+    return counts
+
+def load_segments(alias, category, method=None, query=None):
+    """
+    Sentences behind one heatmap cell, read from the segment index.
+
+    Args:
+        alias (str): Row alias of the cell ('<Company> <year>').
+        category (str): ESG category ('Social', 'Environmental' or 'Governance').
+        method (str, optional): Extraction method (counts folder).
+        query (str, optional): Terms the sentences must contain.
+
+    Returns:
+        pd.DataFrame or None: The matching segments, or None without an index.
+    """
+    if not os.path.exists(DEFAULT_INDEX_DB):
+        return None
+    rows = data[data["Alias"] == alias]
+    if rows.empty:
+        return pd.DataFrame()
+    company, year = rows["Company"].iloc[0], rows["Year"].iloc[0]
+    return search(
+        query or None,
+        categories=[category],
+        companies=[company],
+        years=[int(year)] if pd.notna(year) else None,
+        method=method,
+        limit=DRILLDOWN_LIMIT,
+        db_path=DEFAULT_INDEX_DB
+    )
+
+def render_segments(segments, title):
+    if segments is None:
+        return html.P(f"No segment index found ({DEFAULT_INDEX_DB}); run the normalization step to build it.")
+    if segments.empty:
+        return html.P(f"{title}: no matching sentences.")
+    return html.Div([
+        html.H5(f"{title} ({len(segments)} sentences{'+' if len(segments) == DRILLDOWN_LIMIT else ''})"),
+        html.Ul([
+            html.Li([html.Small(f"[{row.method}, offset {row.source_offset}] "), row.text])
+            for row in segments.itertuples()
+        ], style={"maxHeight": "50vh", "overflowY": "auto"})
+    ])
+
+# Load data (used for the dropdown options)
+data = load_counts()
 
 # Initialize Flask app
 server = Flask(__name__)
@@ -153,6 +226,16 @@ def individual_dashboard():
                 dcc.Graph(id="esg-heatmap", style={"height": "70vh"})
             ], style=plot_container_style)
         ], md=12)
+    ]),
+
+    dbc.Row([
+        dbc.Col([
+            html.Div([
+                dcc.Input(id="drilldown-query", type="text", debounce=True,
+                          placeholder="Filter sentences by terms (e.g. emission* scope)", style=dropdown_style),
+                html.Div("Click a heatmap cell to list its sentences.", id="esg-drilldown")
+            ], style=plot_container_style)
+        ], md=12)
     ])
     
     ])
@@ -213,7 +296,8 @@ def comparison_dashboard():
         dbc.Row([
             dbc.Col([
                 html.Div([
-                    dcc.Graph(id="comparison-heatmap", style={"height": "40vh"})
+                    dcc.Graph(id="comparison-heatmap", style={"height": "40vh"}),
+                    html.Div("Click a heatmap cell to list its sentences.", id="comparison-drilldown")
                 ], style=plot_container_style)
             ], md=12)
         ])
@@ -244,13 +328,11 @@ def update_individual_dashboard(n_clicks, selected_companies, selected_method, s
     if not selected_companies or not selected_years:
         return [{}, {}, {}, {}, {}, {}, {"textAlign": "center", "color": "red"}]
     
-    filtered_data = data[
-        (data["Company"].isin(selected_companies)) &
-        (data["Year"].isin(selected_years))
-    ]
-    
-    if selected_method:
-        filtered_data = filtered_data[filtered_data["Folder"] == selected_method]
+    filtered_data = load_counts(
+        companies=selected_companies,
+        years=selected_years,
+        folders=[selected_method] if selected_method else None
+    )
     
     bar_fig = go.Figure()
     bar_fig.add_trace(go.Bar(x=filtered_data["Alias"], y=filtered_data["Social_Count"], name="Social Count"))
@@ -315,10 +397,7 @@ def update_individual_dashboard(n_clicks, selected_companies, selected_method, s
     Input("comparison-year-dropdown", "value")
 ])
 def update_comparison_dashboard(selected_companies, selected_years):
-    filtered_data = data[
-        (data["Company"].isin(selected_companies)) &
-        (data["Year"].isin(selected_years))
-    ]
+    filtered_data = load_counts(companies=selected_companies, years=selected_years)
     
     # Generate Bar Plots
     bar_e = px.bar(filtered_data, x="Alias", y="Environmental_Count", color="Folder", title="Environmental Count by Method", barmode="group")
@@ -383,5 +462,29 @@ def update_comparison_dashboard(selected_companies, selected_years):
     return bar_e, bar_s, bar_g, heatmap_fig
 
 
+@app.callback(
+    Output("esg-drilldown", "children"),
+    [Input("esg-heatmap", "clickData"), Input("drilldown-query", "value")],
+    [State("method-dropdown", "value")]
+)
+def drill_down_individual(click_data, query, selected_method):
+    if not click_data:
+        return "Click a heatmap cell to list its sentences."
+    point = click_data["points"][0]
+    category = point["x"].replace("_Count", "")
+    segments = load_segments(point["y"], category, selected_method, query)
+    return render_segments(segments, f"{point['y']} - {category}")
+
+
+@app.callback(Output("comparison-drilldown", "children"), Input("comparison-heatmap", "clickData"))
+def drill_down_comparison(click_data):
+    if not click_data:
+        return "Click a heatmap cell to list its sentences."
+    point = click_data["points"][0]
+    method, category = point["y"].split(" - ", 1)
+    segments = load_segments(point["x"], category, method)
+    return render_segments(segments, f"{point['x']} - {point['y']}")
+
+
 if __name__ == "__main__":
     app.run_server(debug=True)
\ No newline at end of file
@@ -0,0 +1,328 @@
+import os
+import re
+import json
+from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from output_writer import atomic_writer, read_text, strip_compression_suffix
+
+import tabular_path  # noqa: F401 (makes the Tabular modules importable)
+from tracing import traced
+
+# Segment boundaries used by the classifier (newlines and full stops)
+SEGMENT_PATTERN = r'\n|\.'
+
+# Order in which tied segments are appended to the categories
+TIE_ORDER = ["Governance", "Social", "Environmental"]
+
+
+@traced('classify')
+def classify_text(text, keywords):
+    """
+    Classify the given text into ESG categories based on keyword matches.
+
+    Args:
+        text (str): Input text to classify.
+        keywords (dict): Dictionary of ESG categories with associated keywords.
+
+    Returns:
+        dict: Dictionary with ESG categories and matching text sections.
+    """
+    classifications = defaultdict(list)
+
+    # Tokenize text into sentences or paragraphs
+    segments = re.split(SEGMENT_PATTERN, text)
+
+    for segment in segments:
+        match_counts = {category: 0 for category in keywords.keys()}
+
+        for category, keyword_list in keywords.items():
+            for keyword in keyword_list:
+                if re.search(rf'\b{keyword}\b', segment, re.IGNORECASE):
+                    match_counts[category] += 1
+
+        # Determine the category based on match counts
+        max_matches = max(match_counts.values())
+        top_categories = [cat for cat, count in match_counts.items() if count == max_matches]
+
+        if max_matches == 0:
+            continue  # Skip segment if no matches
+
+        if len(top_categories) > 1:
+            # Resolve tie by assigning to all
+            classifications["Governance"].append(segment.strip())
+            classifications["Social"].append(segment.strip())
+            classifications["Environmental"].append(segment.strip())
+        else:
+            # Assign to the category with the most matches
+            classifications[top_categories[0]].append(segment.strip())
+
+    return classifications
+
+
+def load_keywords():
+    """
+    Load predefined ESG keywords for classification.
+
+    Returns:
+        dict: Dictionary with ESG categories and their associated keywords.
+    """
+    return {
+        "Environmental": [ "greenhouse gas", "waste production", "renewable energy", "water consumption", "climate change",
+                          "pollution", 'CO2 emissions', 'environmental impact', 'sustainable energy','environmentally sustainable',
+                          'net-zero emissions','environmental management', 'waste reduction','water resource management',
+                          'energy conservation', 'deforestation', 'decarbonisation', 'Brown Industries', 'Clean Technology',
+                          'Fossil Fuels', 'Green Industries', 'Green Bonds',
+                         ],
+        "Social": ['employee diversity','workplace inclusion','workplace equality','employee well-being','human rights compliance',
+                   'workforce satisfaction','supplier responsibility','social impact','CSR activities','workplace safety',
+                   "employee training", "diversity", "inclusion", "community engagement", 'conflict', 'employee relations'
+                   "health and safety", "workplace accidents", "staff turnover", "social initiatives", 'Community Impact Investing',
+
+                        ],
+        "Governance": ['leadership accountability','board diversity','business integrity','corporate disclosure', 'strategic risk mitigation',
+                       'corruption prevention', 'stakeholder communication', 'regulatory adherence', 'business ethics', "anti-corruption",
+                       "data privacy", "executive pay", "compliance", "supplier audits", "governance diversity", "ethical policies",
+                       'bribery and corruption', 'tax strategy', 'political lobbying and donations', 'broad diversity', 'benchmarking',
+                       'corporate governance', 'Board of Directors', 'Engagement', 'Stewardship', 'ESG Fund Ratings', 'ESG Integration',
+                       'Shareholder Activism', 'Proxy Voting', 'Ethical Investing',
+                        ]
+    }
+
+
+def save_results(results, output_file):
+    """
+    Save classification results to a JSON file.
+
+    Args:
+        results (dict): Classification results.
+        output_file (str): File path to save results.
+    """
+    with atomic_writer(output_file) as f:
+        json.dump(results, f, ensure_ascii=False, indent=4)
+
+
+@traced('classify.build_segment_table')
+def build_segment_table(texts):
+    """
+    Split many documents into one columnar table of segments.
+
+    Args:
+        texts (dict): Mapping of document id to raw text.
+
+    Returns:
+        pd.DataFrame: One row per segment with 'doc_id', 'segment_idx' and 'segment' columns.
+    """
+    docs = pd.Series(list(texts.values()), index=list(texts.keys()), dtype=object)
+    segments = docs.str.split(SEGMENT_PATTERN, regex=True).explode()
+
+    table = pd.DataFrame({
+        'doc_id': segments.index.to_numpy(),
+        'segment': segments.to_numpy(dtype=object)
+    })
+    table['segment_idx'] = table.groupby('doc_id', sort=False).cumcount()
+    return table[['doc_id', 'segment_idx', 'segment']]
+
+
+@lru_cache(maxsize=8)
+def _keyword_matcher(keyword_items):
+    """
+    Compile every keyword into one pattern and the tables that map its matches to columns.
+
+    The pattern is a lookahead alternation with one named group per keyword, so
+    a single scan reports overlapping keywords. At one position only the longest
+    keyword is reported; `implied` lists, for each keyword, the keywords that
+    necessarily match at the same position: itself and any keyword that is a
+    word-bounded prefix of it ('board' for 'board diversity').
+
+    Args:
+        keyword_items (tuple): ((category, (keyword, ...)), ...) in column order.
+
+    Returns:
+        tuple: (compiled pattern, implied keyword indices per keyword, column of each keyword)
+    """
+    flat = [(col, keyword) for col, (_, keyword_list) in enumerate(keyword_items) for keyword in keyword_list]
+    longest_first = sorted(range(len(flat)), key=lambda i: -len(flat[i][1]))
+    # Anchored on word boundaries so the alternation is only tried where a word starts
+    pattern = re.compile(
+        r'\b(?=' + '|'.join(rf'(?P<k{i}>{flat[i][1]}\b)' for i in longest_first) + ')',
+        re.IGNORECASE
+    )
+    implied = [
+        [j for j, (_, shorter) in enumerate(flat) if re.match(rf'\b{shorter}\b', keyword, re.IGNORECASE)]
+        for _, keyword in flat
+    ]
+    columns = np.array([col for col, _ in flat], dtype=np.intp)
+    return pattern, implied, columns
+
+
+@traced('classify.keyword_hit_matrix')
+def keyword_hit_matrix(segments, keywords):
+    """
+    Count the distinct keywords of each category found in every segment.
+
+    Every segment is scanned once with a combined pattern whose named groups
+    identify the keyword; the (segment, keyword) hits are then summed into
+    category columns.
+
+    Args:
+        segments (pd.Series): Segment strings.
+        keywords (dict): Dictionary of ESG categories with associated keywords.
+
+    Returns:
+        np.ndarray: Matrix of shape (len(segments), len(keywords)) with match counts,
+            columns ordered like keywords.keys().
+    """
+    hits = np.zeros((len(segments), len(keywords)), dtype=np.int32)
+    if len(segments) == 0:
+        return hits
+
+    pattern, implied, columns = _keyword_matcher(
+        tuple((category, tuple(keyword_list)) for category, keyword_list in keywords.items())
+    )
+    rows, found = [], []
+    for row, segment in enumerate(segments.astype(object).to_numpy()):
+        if not isinstance(segment, str):
+            continue
+        matched = set()
+        for match in pattern.finditer(segment):
+            matched.update(implied[int(match.lastgroup[1:])])
+        rows.extend([row] * len(matched))
+        found.extend(matched)
+
+    if rows:
+        # Each distinct keyword counts once per segment, as in classify_text
+        np.add.at(hits, (np.asarray(rows, dtype=np.intp), columns[np.asarray(found, dtype=np.intp)]), 1)
+    return hits
+
+
+@traced('classify.classify_segments')
+def classify_segments(table, keywords):
+    """
+    Classify every segment of a segment table at once.
+
+    Applies the same rule as classify_text: the category with the most keyword
+    matches wins, segments without matches are dropped and ties are assigned
+    to all categories.
+
+    Args:
+        table (pd.DataFrame): Segment table from build_segment_table.
+        keywords (dict): Dictionary of ESG categories with associated keywords.
+
+    Returns:
+        pd.DataFrame: Matched segments with an added 'category' column (None for ties)
+            and one '<category>_matches' column per category.
+    """
+    categories = list(keywords.keys())
+    hits = keyword_hit_matrix(table['segment'], keywords)
+
+    max_matches = hits.max(axis=1)
+    matched = max_matches > 0
+    tied = (hits == max_matches[:, None]).sum(axis=1) > 1
+
+    result = table.loc[matched].copy()
+    labels = np.asarray(categories, dtype=object)[hits.argmax(axis=1)]
+    labels[tied] = None
+    result['category'] = labels[matched]
+    for col, category in enumerate(categories):
+        result[f'{category}_matches'] = hits[matched, col]
+    return result
+
+
+def _collect_classifications(classified):
+    """Rebuild the classify_text output dict from the classified rows of one document."""
+    segments = classified['segment'].str.strip().to_numpy(dtype=object)
+    labels = classified['category'].to_numpy(dtype=object)
+    tied = pd.isna(labels)
+
+    # Preserve the key order classify_text produces (first appearance, ties in TIE_ORDER)
+    first_seen = []
+    for category in pd.unique(np.concatenate([labels[~tied], TIE_ORDER])):
+        mask = (labels == category) | (tied & (category in TIE_ORDER))
+        if mask.any():
+            position = int(np.argmax(mask))
+            rank = TIE_ORDER.index(category) if tied[position] else 0
+            first_seen.append((position, rank, category, mask))
+
+    classifications = defaultdict(list)
+    for _, _, category, mask in sorted(first_seen, key=lambda item: item[:2]):
+        classifications[category] = segments[mask].tolist()
+    return classifications
+
+
+def classify_texts_batch(texts, keywords):
+    """
+    Classify many documents in one vectorized pass.
+
+    Produces the same output as calling classify_text on every document.
+
+    Args:
+        texts (dict): Mapping of document id to raw text.
+        keywords (dict): Dictionary of ESG categories with associated keywords.
+
+    Returns:
+        dict: Mapping of document id to its classification dict.
+    """
+    table = build_segment_table(texts)
+    classified = classify_segments(table, keywords)
+
+    results = {doc_id: defaultdict(list) for doc_id in texts}
+    for doc_id, group in classified.groupby('doc_id', sort=False):
+        results[doc_id] = _collect_classifications(group)
+    return results
+
+
+def read_normalized_texts(directories):
+    """
+    Read every '_normalized.txt' file in the given directories.
+
+    Args:
+        directories (list): Directories containing normalized text files.
+
+    Returns:
+        dict: Mapping of input file path to its text.
+    """
+    texts = {}
+    for directory_path in directories:
+        for filename in os.listdir(directory_path):
+            filename = strip_compression_suffix(filename)
+            if filename.endswith('_normalized.txt'):
+                input_file = os.path.join(directory_path, filename)
+                texts[input_file] = read_text(input_file)
+    return texts
+
+
+def classify_directories(directories, keywords=None, backend='rules'):
+    """
+    Classify every '_normalized.txt' file in the given directories in one batch.
+
+    Args:
+        directories (list): Directories containing normalized text files.
+        keywords (dict, optional): ESG keywords. Defaults to load_keywords().
+        backend (str): 'rules' for the keyword rules or 'ml' for the trained model
+            in ml_classifier.py.
+
+    Returns:
+        dict: Mapping of output JSON path to its classification dict.
+    """
+    keywords = keywords or load_keywords()
+    if backend == 'ml':
+        from ml_classifier import classify_texts_batch as classify_batch
+    elif backend == 'rules':
+        classify_batch = classify_texts_batch
+    else:
+        raise ValueError(f"Unknown classification backend: {backend!r} (expected 'rules' or 'ml')")
+
+    texts = {
+        input_file[:-15] + "_classification_results.json": text
+        for input_file, text in read_normalized_texts(directories).items()
+    }
+    results = classify_batch(texts, keywords)
+    for output_file, classifications in results.items():
+        save_results(classifications, output_file)
+        print(f"Classification completed. Results saved to {output_file}")
+
+    return results
@@ -0,0 +1,95 @@
+import json
+import os
+import re
+import csv
+
+from output_writer import atomic_writer
+
+import tabular_path  # noqa: F401 (makes the Tabular modules importable)
+from metrics_store import DEFAULT_DB, append_esg_counts, start_run
+
+# Company and report year at the start of a report filename, as read by the dashboard
+FILENAME_PATTERN = re.compile(r"^(.*?)_(\d{4})")
+
+
+def company_and_year(filename):
+    """Split a report filename like 'Acme_Corp_2021_...' into ('Acme Corp', '2021')."""
+    match = FILENAME_PATTERN.match(filename)
+    if match:
+        return match.group(1).replace('_', ' '), match.group(2)
+    return filename, None
+
+
+def count_esg_entries(json_data):
+    """Count entries in each ESG category from JSON data"""
+    return {
+        'Social': len(json_data.get('Social', [])),
+        'Environmental': len(json_data.get('Environmental', [])),
+        'Governance': len(json_data.get('Governance', []))
+    }
+
+def analyze_json_files():
+    # Folders to analyze
+    folders = ['pypdf2', 'pdfplumber', 'textract']
+    
+    # List to store results
+    results = []
+    
+    # Process each folder
+    for folder in folders:
+        if not os.path.exists(folder):
+            print(f"Warning: Folder {folder} not found")
+            continue
+            
+        # Process each JSON file in the folder
+        for filename in os.listdir(folder):
+            if filename.endswith('.json'):
+                filepath = os.path.join(folder, filename)
+                try:
+                    with open(filepath, 'r', encoding='utf-8') as f:
+                        json_data = json.load(f)
+                        counts = count_esg_entries(json_data)
+                        
+                        # Add result with folder and filename information
+                        results.append({
+                            'Folder': folder,
+                            'Filename': filename,
+                            'Social_Count': counts['Social'],
+                            'Environmental_Count': counts['Environmental'],
+                            'Governance_Count': counts['Governance']
+                        })
+                except Exception as e:
+                    print(f"Error processing {filepath}: {str(e)}")
+    
+    # Write results to CSV
+    write_esg_counts(results)
+    return results
+
+
+def write_esg_counts(results, csv_filename='esg_counts.csv', metrics_db=DEFAULT_DB):
+    """
+    Write per-file ESG counts to the CSV read by the dashboard and append them to the metrics store.
+
+    Args:
+        results (list): Rows with 'Folder', 'Filename' and the three *_Count columns.
+        csv_filename (str): CSV path.
+        metrics_db (str, optional): SQLite metrics store; None disables it.
+    """
+    if results:
+        fieldnames = ['Folder', 'Filename', 'Social_Count', 'Environmental_Count', 'Governance_Count']
+        
+        with atomic_writer(csv_filename, newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(results)
+        
+        print(f"Results written to {csv_filename}")
+
+        if metrics_db:
+            rows = [dict(zip(('Company', 'Year'), company_and_year(row['Filename'])), **row) for row in results]
+            append_esg_counts(start_run('esg_counts', metrics_db), rows, metrics_db)
+    else:
+        print("No results found to write to CSV")
+
+if __name__ == "__main__":
+    analyze_json_files()
@@ -0,0 +1,196 @@
+import pandas as pd
+import os
+import time
+import psutil
+import threading
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from output_writer import write_text
+from text_extractors import (EXTRACTION_METHODS, TEXT_BACKENDS, clean_raw_text, extract_text_from_pdf,
+                             extract_with_pdfplumber, extract_with_pypdf2, save_clean_text)
+
+import tabular_path  # noqa: F401 (makes the Tabular modules importable)
+from tracing import flush_trace
+from metrics_store import DEFAULT_DB, append_metric, start_run
+from job_ledger import (DEFAULT_LEDGER, DONE, FAILED, MAX_ATTEMPTS, batch_jobs, batch_run_id, batch_summary,
+                        job_key, open_batch, run_with_retries)
+
+
+def measure_extraction_performance_parallel(extraction_func, pdf_path):
+    """
+    Measure performance metrics for a given extraction method in parallel.
+    
+    Args:
+        extraction_func (callable): Raw text extraction from EXTRACTION_METHODS.
+        pdf_path (str): Path to PDF file.
+    
+    Returns:
+        tuple: (extracted text, performance metrics for the extraction method)
+    """
+    metrics = {
+        'extraction_time': 0,
+        'memory_usage': 0,
+        'cpu_usage': 0,
+        'extracted_text_length': 0
+    }
+    
+    # Function to monitor CPU and memory usage
+    def monitor_performance():
+        process = psutil.Process()
+        while not stop_event.is_set():
+            metrics['memory_usage'] = max(metrics['memory_usage'], process.memory_info().rss / (1024 * 1024))
+            metrics['cpu_usage'] = max(metrics['cpu_usage'], psutil.cpu_percent(interval=0.1))
+            time.sleep(0.1)
+
+    # Start monitoring in a separate thread
+    stop_event = threading.Event()
+    monitor_thread = threading.Thread(target=monitor_performance)
+    monitor_thread.start()
+
+    # Perform the extraction (errors reach the job ledger after monitoring stops)
+    start_time = time.time()
+    try:
+        extracted_text = extraction_func(pdf_path)
+    finally:
+        metrics['extraction_time'] = time.time() - start_time
+        # Stop monitoring and wait for the thread to finish
+        stop_event.set()
+        monitor_thread.join()
+    metrics['extracted_text_length'] = len(extracted_text)
+
+    return extracted_text, metrics
+
+
+def clean_text(text, filename, method, compression=None):
+    """
+    Clean extracted text and save to file
+    
+    Args:
+        text (str): Raw extracted text
+        filename (str): Name of the source file
+        method (str): Extraction method used
+        compression (str, optional): None, 'gzip' or 'zstd' for the saved text
+    
+    Returns:
+        str: Cleaned text
+    """
+    text = clean_raw_text(text)
+    
+    # Write cleaned text to file (replaces any previous run's output)
+    write_text(text, os.path.join(method, filename[:-4] + ".txt"), compression=compression)
+    
+    return text
+
+
+def run_text_job(pdf_path, method_name, run_id=None, metrics_db=DEFAULT_DB):
+    """Extract, clean and save one PDF with one backend and return its performance row."""
+    extracted_text, performance_metrics = measure_extraction_performance_parallel(
+        EXTRACTION_METHODS[method_name], pdf_path
+    )
+    # Cleaning and saving stay out of the measured time; output folders follow
+    # the notebooks: ./<method>/<name>.txt
+    save_clean_text(pdf_path, extracted_text, f"./{method_name.lower()}/")
+    filename = os.path.basename(pdf_path)
+    row = {
+        'Filename': filename,
+        'Extraction Method': method_name,
+        **performance_metrics
+    }
+    if run_id:
+        append_metric(run_id, 'text', row, metrics_db)
+    print(f'{filename} processed successfully with {method_name}')
+    return row
+
+
+def run_ledger_job(batch, key, pdf_path, method_name, run_id, metrics_db, max_attempts, ledger_db):
+    """Run one text job under the ledger; module-level so pool workers can unpickle it."""
+    try:
+        return run_with_retries(batch, key, partial(run_text_job, pdf_path, method_name, run_id, metrics_db),
+                                max_attempts, ledger_db)
+    finally:
+        # Pool workers exit without running atexit handlers
+        flush_trace()
+
+
+def process_pdf_directory(directory_path, performance_file="extraction_performance.csv", methods=None,
+                          metrics_db=DEFAULT_DB, resume=False, ledger_db=DEFAULT_LEDGER, max_attempts=MAX_ATTEMPTS,
+                          max_workers=1):
+    """
+    Process all PDFs in a directory with performance tracking
+    
+    Each (pdf, method) pair is a job in the ledger, so with resume=True an
+    interrupted batch continues with the unfinished jobs only and failed jobs
+    are retried up to max_attempts times. With max_workers > 1 (or None for
+    one per CPU) jobs run in a process pool; the ledger hands every job to
+    exactly one worker, and a job that raises only fails itself. Textract
+    shells out once per file, so its files are extracted concurrently too.
+    
+    Args:
+        directory_path (str): Path to directory with PDFs
+        performance_file (str): Path to save performance metrics
+        methods (list, optional): Extraction methods to run (keys of TEXT_BACKENDS). Defaults to all.
+        metrics_db (str, optional): SQLite metrics store each row is appended to as it completes; None disables it.
+        resume (bool): Continue the ledger of a previous run instead of starting over.
+        ledger_db (str): SQLite job ledger.
+        max_attempts (int): Attempts per job before it stays failed.
+        max_workers (int, optional): Worker processes; 1 runs every job in this process.
+    
+    Returns:
+        pd.DataFrame: DataFrame with performance metrics
+    """
+    unknown = set(methods or []) - set(TEXT_BACKENDS)
+    if unknown:
+        raise ValueError(f"Unknown extraction methods: {sorted(unknown)}")
+
+    performance_results = []
+    method_names = [method_name for method_name in TEXT_BACKENDS if methods is None or method_name in methods]
+
+    batch = f"text:{os.path.abspath(directory_path)}"
+    jobs = {
+        job_key(os.path.join(directory_path, filename), method_name): (os.path.join(directory_path, filename), method_name)
+        for filename in sorted(os.listdir(directory_path)) if filename.endswith('.pdf')
+        for method_name in method_names
+    }
+    run_id = None
+    if metrics_db:
+        # A resumed batch keeps appending to the metrics run it started
+        run_id = (resume and batch_run_id(batch, ledger_db)) or start_run('text', metrics_db)
+    open_batch(batch, list(jobs), resume=resume, run_id=run_id, db_path=ledger_db)
+
+    if max_workers == 1:
+        for key, (pdf_path, method_name) in jobs.items():
+            run_ledger_job(batch, key, pdf_path, method_name, run_id, metrics_db, max_attempts, ledger_db)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(run_ledger_job, batch, key, pdf_path, method_name, run_id, metrics_db,
+                                max_attempts, ledger_db)
+                for key, (pdf_path, method_name) in jobs.items()
+            ]
+            for future in as_completed(futures):
+                future.result()
+
+    # Append performance results, including jobs finished by an earlier run
+    for key, state in batch_jobs(batch, ledger_db).items():
+        if key not in jobs:
+            continue
+        if state['status'] == DONE:
+            performance_results.append(state['result'])
+        elif state['status'] == FAILED:
+            pdf_path, method_name = jobs[key]
+            print(f"Error processing {os.path.basename(pdf_path)} with {method_name}: {state['last_error']}")
+    print(f"Job ledger: {batch_summary(batch, ledger_db)}")
+
+    # Save performance metrics
+    performance_df = pd.DataFrame(performance_results)
+    performance_df.to_csv(performance_file, index=False)
+    print(f"Performance metrics saved to {performance_file}")
+    
+    return performance_df
+
+
+if __name__ == "__main__":
+    # Example usage
+    pdf_directory = "../ESG REPORTS"
+    performance_metrics = process_pdf_directory(pdf_directory)
+    print(performance_metrics)
@@ -0,0 +1,377 @@
+import os
+import re
+import sqlite3
+from collections import defaultdict
+
+import pandas as pd
+
+from output_writer import find_existing, read_text, strip_compression_suffix
+from esg_json_analyzer import company_and_year
+
+import tabular_path  # noqa: F401 (makes the Tabular modules importable)
+from tracing import traced
+
+DEFAULT_FACTS_DB = 'esg_facts.db'
+
+# Units facts are stored with, longest first so 'MT CO₂e' wins over 'MT'.
+# Single letters that are rarely units in prose (K, J, g) are left out.
+FACT_UNITS = [
+    'MT CO₂e', 'MT CO₂', 'MT waste', 'kg waste', 'L/day',
+    'MWh', 'kWh', 'GJ', 'BTU', 'MW', 'kW',
+    'MT', 'kg', 'lbs',
+    'm³', 'km²', 'm²', 'mL', 'gal', 'ha', 'acre', 'L',
+    '°C', '°F', '%', 'USD', 'EUR',
+]
+
+# How the compound units read after normalization.standardize_units, which
+# shortens 'metric tons of CO2' to 'MT of CO2'; other units read as stored
+UNIT_FORMS = {
+    'MT CO₂e': r'MT\s+(?:of\s+)?CO[2₂](?:e|\s+equivalents?)',
+    'MT CO₂': r'MT\s+(?:of\s+)?CO[2₂]',
+    'MT waste': r'MT\s+(?:of\s+)?waste',
+    'kg waste': r'kg\s+(?:of\s+)?waste',
+}
+
+# Metric named by the keywords nearest to a value in its sentence. The scope
+# patterns consume the word 'emissions' so it is not also read as a generic
+# GHG mention.
+FACT_METRICS = {
+    'Scope 1 emissions': r'scope\s*1(?:\s+(?:ghg|greenhouse gas|co2|co₂))?(?:\s+emissions)?',
+    'Scope 2 emissions': r'scope\s*2(?:\s+(?:ghg|greenhouse gas|co2|co₂))?(?:\s+emissions)?',
+    'Scope 3 emissions': r'scope\s*3(?:\s+(?:ghg|greenhouse gas|co2|co₂))?(?:\s+emissions)?',
+    'GHG emissions': r'greenhouse gas emissions|co2 emissions|emissions',
+    'Sustainable energy': r'sustainable energy|renewable',
+    'Energy consumption': r'energy|electricity|fuel',
+    'Water': r'water',
+    'Waste': r'waste',
+    'Workplace safety': r'workplace safety|injur\w*|fatalit\w*|lost time',
+    'Women in workforce': r'women|female',
+    'Board diversity': r'board diversity|independent directors?',
+    'Employees': r'employees|workforce|headcount',
+    'Social impact': r'social impact|donations?|communit\w*',
+}
+
+UNSPECIFIED_METRIC = 'Unspecified'
+
+SCALES = {'thousand': 1e3, 'million': 1e6, 'billion': 1e9}
+
+# Extra characters a keyword or year after a value counts as being away from it, so
+# 'Scope 1 emissions were 3.4 MT, mostly from energy' keeps the preceding keyword
+FOLLOWING_PENALTY = 15
+
+# Keywords and years further than this many characters from every number are ignored
+MAX_DISTANCE = 80
+
+# Sentence boundaries that do not split decimals such as 1,234.5
+_SENTENCE = re.compile(r'[^\n.]*(?:(?<=\d)\.(?=\d)[^\n.]*)*')
+_NUMBER = r'(?<![\w.,])(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)'
+_SCALE = r'(?:\s*(?P<scale>thousand|million|billion))?'
+_UNIT = '(?P<unit>' + '|'.join(UNIT_FORMS.get(unit, re.escape(unit)) for unit in FACT_UNITS) + r')(?![A-Za-z0-9²³₂])'
+_VALUE = re.compile(
+    # 'USD 5 million' as well as '5 million USD'
+    r'(?:(?P<currency>USD|EUR)\s*' + _NUMBER + _SCALE + r')|(?:' + _NUMBER.replace('number', 'number2') +
+    _SCALE.replace('scale', 'scale2') + r'\s*' + _UNIT + ')',
+    re.IGNORECASE
+)
+_METRIC = re.compile(
+    '|'.join(f"(?P<m{i}>\\b(?:{pattern})\\b)" for i, pattern in enumerate(FACT_METRICS.values())),
+    re.IGNORECASE
+)
+_METRIC_NAMES = {f"m{i}": name for i, name in enumerate(FACT_METRICS)}
+_YEAR = re.compile(r'\b(?:19|20)\d{2}\b')
+# Numbers without a unit ('(2020: 3.9 thousand)') that can own a keyword or year
+_BARE_NUMBER = re.compile(r'(?<![\w.,])\d+(?:[.,]\d+)*')
+_UNITS_BY_CASE = {unit.lower(): unit for unit in FACT_UNITS}
+_UNIT_FORMS = [(re.compile(pattern, re.IGNORECASE), unit) for unit, pattern in UNIT_FORMS.items()]
+
+
+def _stored_unit(unit):
+    """Unit a fact is stored with for the unit text it was written with."""
+    for form, stored in _UNIT_FORMS:
+        if form.fullmatch(unit):
+            return stored
+    return _UNITS_BY_CASE[unit.lower()]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    method TEXT,
+    company TEXT,
+    year INTEGER,
+    source_version TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS facts (
+    doc_id INTEGER NOT NULL REFERENCES documents(doc_id),
+    company TEXT,
+    year INTEGER,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    unit TEXT NOT NULL,
+    source_offset INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_facts_company_year_metric ON facts(company, year, metric);
+CREATE INDEX IF NOT EXISTS idx_facts_metric_year ON facts(metric, year);
+CREATE INDEX IF NOT EXISTS idx_facts_doc ON facts(doc_id);
+"""
+
+# Rows inserted per executemany call
+INSERT_BATCH = 5000
+
+
+def _overlaps(span, matches):
+    return any(match.start() < span[1] and span[0] < match.end() for match in matches)
+
+
+def _claims(labels, anchors):
+    """
+    Attach every label (metric keyword or year) to the number nearest to it.
+
+    A label belongs to one number only, so in '45,000 MWh of electricity and
+    1.2 million m³ of water' electricity goes to the MWh value and cannot also
+    name the m³ value. A label inside a value ('waste' in 'MT waste') belongs to
+    it. Labels further than MAX_DISTANCE from every number stay unattached; on
+    equal distance the number after the label wins.
+
+    Args:
+        labels (list): Regex matches of the labels in a sentence.
+        anchors (list): (start, end) spans of the numbers in the sentence, in order.
+
+    Returns:
+        dict: Anchor index to a list of (distance, label), with FOLLOWING_PENALTY
+        added to the distance of labels that come after their number.
+    """
+    claims = defaultdict(list)
+    for label in labels:
+        best, best_gap, after = None, None, False
+        for k, (start, end) in enumerate(anchors):
+            if label.end() <= start:
+                gap, label_after = start - label.end(), False
+            elif label.start() >= end:
+                gap, label_after = label.start() - end, True
+            else:
+                # Part of the value itself, like 'waste' in 'MT waste'
+                gap, label_after = 0, False
+            if best_gap is None or gap < best_gap or (gap == best_gap and not label_after):
+                best, best_gap, after = k, gap, label_after
+        if best is not None and best_gap <= MAX_DISTANCE:
+            claims[best].append((best_gap + (FOLLOWING_PENALTY if after else 0), label))
+    return claims
+
+
+def _closest(claimed):
+    """Label with the smallest weighted distance, the first one on ties, or None."""
+    return min(claimed, key=lambda item: item[0])[1] if claimed else None
+
+
+@traced('facts.extract')
+def iter_facts(text, report_year=None):
+    """
+    Stream (metric, value, unit, year, source_offset) facts out of a normalized text.
+
+    Each value with a canonical unit is attributed to a metric keyword and a year
+    of its sentence. Keywords and years belong to the number nearest to them,
+    including numbers without a unit, so '(2020: 3.9 thousand)' keeps its year to
+    itself. Among the keywords a value owns, the closest wins, with those before
+    it preferred by FOLLOWING_PENALTY characters. Values owning no year get the
+    report year and values owning no keyword are 'Unspecified'.
+
+    Args:
+        text (str): Normalized text.
+        report_year (int, optional): Year used when the sentence names none.
+
+    Yields:
+        tuple: (metric, value, unit, year, source_offset) with the offset of the value in text.
+    """
+    for sentence in _SENTENCE.finditer(text):
+        values = list(_VALUE.finditer(sentence.group()))
+        if not values:
+            continue
+        metrics = list(_METRIC.finditer(sentence.group()))
+        years = [year for year in _YEAR.finditer(sentence.group()) if not _overlaps(year.span(), values)]
+
+        # Every number of the sentence can own keywords and years, not only the values
+        anchors = sorted([value.span() for value in values] + [
+            number.span() for number in _BARE_NUMBER.finditer(sentence.group())
+            if not _overlaps(number.span(), values + years + metrics)
+        ])
+        anchor_index = {span: k for k, span in enumerate(anchors)}
+        metric_claims = _claims(metrics, anchors)
+        year_claims = _claims(years, anchors)
+
+        for value in values:
+            if value.group('currency'):
+                number, scale, unit = value.group('number'), value.group('scale'), value.group('currency')
+            else:
+                number, scale, unit = value.group('number2'), value.group('scale2'), value.group('unit')
+            amount = float(number.replace(',', '')) * SCALES.get((scale or '').lower(), 1)
+
+            k = anchor_index[value.span()]
+            metric = _closest(metric_claims.get(k))
+            year = _closest(year_claims.get(k))
+            yield (
+                _METRIC_NAMES[metric.lastgroup] if metric else UNSPECIFIED_METRIC,
+                amount,
+                _stored_unit(unit),
+                int(year.group()) if year else report_year,
+                sentence.start() + value.start(),
+            )
+
+
+def connect(db_path=DEFAULT_FACTS_DB):
+    """Open (and create if needed) the fact store in WAL mode so pipeline workers can write concurrently."""
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=60)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _source_version(path):
+    existing = find_existing(path)
+    stat = os.stat(existing)
+    return f"{os.path.basename(existing)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def store_facts(path, text=None, method=None, db_path=DEFAULT_FACTS_DB, source_version=None):
+    """
+    Extract the facts of one normalized document and replace its previous facts in the store.
+
+    Args:
+        path (str): Normalized text path ('<Company>_<year>..._normalized.txt').
+        text (str, optional): Its content; read from path when omitted.
+        method (str, optional): Extraction method (output folder) the text came from.
+        db_path (str): Fact store path.
+        source_version (str, optional): Identity of the source; unchanged documents are skipped.
+
+    Returns:
+        int: Number of facts stored, or None when the document was unchanged.
+    """
+    filename = os.path.basename(strip_compression_suffix(path))
+    company, year = company_and_year(filename)
+    year = int(year) if year else None
+    if source_version is None:
+        source_version = _source_version(path)
+
+    # Absolute, so a document reached through different relative paths is stored once
+    key = os.path.abspath(path)
+    conn = connect(db_path)
+    try:
+        row = conn.execute('SELECT doc_id, source_version FROM documents WHERE path = ?', (key,)).fetchone()
+        if row and row[1] == source_version:
+            return None
+        if text is None:
+            text = read_text(path)
+
+        with conn:
+            if row:
+                doc_id = row[0]
+                conn.execute('DELETE FROM facts WHERE doc_id = ?', (doc_id,))
+                conn.execute('UPDATE documents SET method = ?, company = ?, year = ?, source_version = ? WHERE doc_id = ?',
+                             (method, company, year, source_version, doc_id))
+            else:
+                doc_id = conn.execute(
+                    'INSERT INTO documents (path, method, company, year, source_version) VALUES (?, ?, ?, ?, ?)',
+                    (key, method, company, year, source_version)
+                ).lastrowid
+
+            count, batch = 0, []
+            for metric, value, unit, fact_year, offset in iter_facts(text, year):
+                batch.append((doc_id, company, fact_year, metric, value, unit, offset))
+                if len(batch) >= INSERT_BATCH:
+                    conn.executemany('INSERT INTO facts VALUES (?, ?, ?, ?, ?, ?, ?)', batch)
+                    count += len(batch)
+                    batch = []
+            conn.executemany('INSERT INTO facts VALUES (?, ?, ?, ?, ?, ?, ?)', batch)
+            count += len(batch)
+    finally:
+        conn.close()
+    return count
+
+
+def extract_facts_from_directories(directories, db_path=DEFAULT_FACTS_DB):
+    """
+    Add the facts of every '_normalized.txt' file in the given directories to the store.
+
+    Documents whose file did not change since they were last indexed are skipped.
+
+    Args:
+        directories (list): Directories containing normalized text files (one per method).
+        db_path (str): Fact store path.
+
+    Returns:
+        dict: Path to the number of facts stored (None for skipped documents).
+    """
+    counts = {}
+    for directory_path in directories:
+        method = os.path.basename(os.path.normpath(directory_path))
+        for filename in sorted(os.listdir(directory_path)):
+            logical_name = strip_compression_suffix(filename)
+            if logical_name.endswith('_normalized.txt'):
+                path = os.path.join(directory_path, logical_name)
+                counts[path] = store_facts(path, method=method, db_path=db_path)
+                print(f"{path}: {'unchanged' if counts[path] is None else f'{counts[path]} facts'}")
+    return counts
+
+
+def query_facts(metric=None, companies=None, years=None, unit=None, method=None, db_path=DEFAULT_FACTS_DB):
+    """
+    Load facts with the filters evaluated on the indexed columns.
+
+    Args:
+        metric (str, optional): Metric name (a key of FACT_METRICS or UNSPECIFIED_METRIC).
+        companies (list, optional): Only these companies.
+        years (list, optional): Only these years.
+        unit (str, optional): Only this unit.
+        method (str, optional): Only documents from this extraction method.
+        db_path (str): Fact store path.
+
+    Returns:
+        pd.DataFrame: company, year, metric, value, unit, source_offset and the document path.
+    """
+    clauses, params = [], []
+    for column, values in (('f.metric', metric), ('f.unit', unit), ('d.method', method)):
+        if values is not None:
+            clauses.append(f"{column} = ?")
+            params.append(values)
+    for column, values in (('f.company', companies), ('f.year', years)):
+        if values is not None:
+            values = list(values)
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})" if values else '0')
+            params.extend(values)
+    where = (' WHERE ' + ' AND '.join(clauses)) if clauses else ''
+
+    conn = connect(db_path)
+    try:
+        return pd.read_sql_query(
+            'SELECT f.company, f.year, f.metric, f.value, f.unit, f.source_offset, d.path, d.method '
+            f'FROM facts f JOIN documents d ON d.doc_id = f.doc_id{where} '
+            'ORDER BY f.company, f.year, d.path, f.source_offset',
+            conn, params=params
+        )
+    finally:
+        conn.close()
+
+
+def metric_by_company_year(metric, unit=None, method=None, agg='max', db_path=DEFAULT_FACTS_DB):
+    """
+    Pivot one metric to a company x year table, e.g. metric_by_company_year('Scope 1 emissions', 'MT CO₂e').
+
+    Args:
+        metric (str): Metric name.
+        unit (str, optional): Only values in this unit (mixing units rarely makes sense).
+        method (str, optional): Only documents from this extraction method.
+        agg (str): How several values of a company and year are combined.
+        db_path (str): Fact store path.
+
+    Returns:
+        pd.DataFrame: Companies as rows, years as columns.
+    """
+    facts = query_facts(metric=metric, unit=unit, method=method, db_path=db_path)
+    return facts.pivot_table(index='company', columns='year', values='value', aggfunc=agg)
+
+
+if __name__ == "__main__":
+    extract_facts_from_directories(['./pypdf2', './pdfplumber', './textract'])
+    print(metric_by_company_year('Scope 1 emissions'))
@@ -0,0 +1,243 @@
+import os
+import time
+from collections import defaultdict
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+from esg_classifier import (
+    TIE_ORDER,
+    build_segment_table,
+    classify_segments,
+    classify_texts_batch as classify_texts_batch_rules,
+    load_keywords,
+    read_normalized_texts,
+)
+
+DEFAULT_MODEL_PATH = 'models/esg_segment_classifier.joblib'
+
+# Extra labels next to the ESG categories: segments the rules skip and tied segments
+NO_MATCH_LABEL = 'None'
+TIE_LABEL = 'Tie'
+
+# Models already loaded in this process, keyed by path
+_model_cache = {}
+
+
+def build_vectorizer(n_features=2 ** 20):
+    """Stateless vectorizer so the persisted model only holds the linear weights."""
+    return HashingVectorizer(
+        n_features=n_features,
+        ngram_range=(1, 3),
+        lowercase=True,
+        alternate_sign=False,
+        norm='l2'
+    )
+
+
+def label_segments(texts, keywords=None):
+    """
+    Label every segment of the given documents with the keyword rules.
+
+    Args:
+        texts (dict): Mapping of document id to raw text.
+        keywords (dict, optional): ESG keywords. Defaults to load_keywords().
+
+    Returns:
+        pd.DataFrame: Segment table with a 'label' column (category, 'Tie' or 'None').
+    """
+    keywords = keywords or load_keywords()
+    table = build_segment_table(texts)
+    classified = classify_segments(table, keywords)
+
+    table['label'] = NO_MATCH_LABEL
+    table.loc[classified.index, 'label'] = classified['category'].fillna(TIE_LABEL)
+    return table
+
+
+def train_model(texts, model_path=DEFAULT_MODEL_PATH, keywords=None, batch_size=50000):
+    """
+    Train the segment classifier offline from the keyword-labelled segments.
+
+    Args:
+        texts (dict): Mapping of document id to raw text used for training.
+        model_path (str): Where to persist the trained model.
+        keywords (dict, optional): ESG keywords used to label the segments.
+        batch_size (int): Number of segments fed to each partial_fit call.
+
+    Returns:
+        dict: The persisted model (vectorizer and classifier).
+    """
+    table = label_segments(texts, keywords)
+    table = table[table['segment'].str.strip() != '']
+    classes = np.array(sorted(table['label'].unique()))
+
+    vectorizer = build_vectorizer()
+    classifier = SGDClassifier(loss='log_loss', alpha=1e-6, random_state=0)
+    for start in range(0, len(table), batch_size):
+        batch = table.iloc[start:start + batch_size]
+        classifier.partial_fit(vectorizer.transform(batch['segment']), batch['label'], classes=classes)
+
+    model = {'vectorizer': vectorizer, 'classifier': classifier}
+    os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+    # Uncompressed so the weight arrays can be memory-mapped on load
+    joblib.dump(model, model_path)
+    _model_cache.pop(model_path, None)
+    print(f"Model trained on {len(table)} segments and saved to {model_path}")
+    return model
+
+
+def load_model(model_path=DEFAULT_MODEL_PATH):
+    """Load a persisted model once per process, memory-mapping its weight arrays."""
+    if model_path not in _model_cache:
+        _model_cache[model_path] = joblib.load(model_path, mmap_mode='r')
+    return _model_cache[model_path]
+
+
+def predict_segments(segments, model_path=DEFAULT_MODEL_PATH, batch_size=50000):
+    """
+    Predict labels for an array of segments in batches.
+
+    Args:
+        segments (pd.Series): Segment strings.
+        model_path (str): Path of the persisted model.
+        batch_size (int): Number of segments vectorized per batch.
+
+    Returns:
+        np.ndarray: Predicted label per segment.
+    """
+    model = load_model(model_path)
+    segments = pd.Series(segments, dtype=object)
+    labels = np.empty(len(segments), dtype=object)
+    for start in range(0, len(segments), batch_size):
+        batch = segments.iloc[start:start + batch_size]
+        labels[start:start + batch_size] = model['classifier'].predict(model['vectorizer'].transform(batch))
+
+    # Empty segments never carry a keyword
+    labels[(segments.str.strip() == '').to_numpy()] = NO_MATCH_LABEL
+    return labels
+
+
+def classify_texts_batch(texts, keywords=None, model_path=DEFAULT_MODEL_PATH):
+    """
+    Classify many documents with the trained model.
+
+    Returns the same structure as esg_classifier.classify_texts_batch; the
+    keywords argument is accepted for interface compatibility only.
+
+    Args:
+        texts (dict): Mapping of document id to raw text.
+        keywords (dict, optional): Unused.
+        model_path (str): Path of the persisted model.
+
+    Returns:
+        dict: Mapping of document id to its classification dict.
+    """
+    table = build_segment_table(texts)
+    table['label'] = predict_segments(table['segment'], model_path)
+
+    results = {doc_id: defaultdict(list) for doc_id in texts}
+    matched = table[table['label'] != NO_MATCH_LABEL]
+    for row in matched.itertuples(index=False):
+        segment = row.segment.strip()
+        if row.label == TIE_LABEL:
+            for category in TIE_ORDER:
+                results[row.doc_id][category].append(segment)
+        else:
+            results[row.doc_id][row.label].append(segment)
+    return results
+
+
+def classify_text(text, keywords=None, model_path=DEFAULT_MODEL_PATH):
+    """
+    Classify the given text into ESG categories with the trained model.
+
+    Args:
+        text (str): Input text to classify.
+        keywords (dict, optional): Unused, kept for interface compatibility.
+        model_path (str): Path of the persisted model.
+
+    Returns:
+        dict: Dictionary with ESG categories and matching text sections.
+    """
+    return classify_texts_batch({0: text}, keywords, model_path)[0]
+
+
+def split_documents(texts, holdout=0.2, seed=0):
+    """
+    Split documents into a training and a held-out set by report.
+
+    The same report extracted by several backends ('pdfplumber/x_normalized.txt'
+    and 'pypdf2/x_normalized.txt') always lands on the same side, so the held-out
+    agreement is measured on reports the model has never seen.
+
+    Args:
+        texts (dict): Mapping of document path to raw text.
+        holdout (float): Share of reports held out.
+        seed (int): Seed of the shuffle.
+
+    Returns:
+        tuple: (training texts, held-out texts)
+    """
+    reports = sorted({os.path.basename(doc_id) for doc_id in texts})
+    rng = np.random.default_rng(seed)
+    rng.shuffle(reports)
+    held_out = set(reports[:max(1, round(holdout * len(reports)))]) if len(reports) > 1 else set()
+
+    train = {doc_id: text for doc_id, text in texts.items() if os.path.basename(doc_id) not in held_out}
+    test = {doc_id: text for doc_id, text in texts.items() if os.path.basename(doc_id) in held_out}
+    return train, test
+
+
+def compare_backends(texts, model_path=DEFAULT_MODEL_PATH, keywords=None):
+    """
+    Report throughput and agreement of the model against the keyword rules.
+
+    Args:
+        texts (dict): Mapping of document id to raw text.
+        model_path (str): Path of the persisted model.
+        keywords (dict, optional): ESG keywords for the rule backend.
+
+    Returns:
+        dict: Segment count, segments per second for each backend and label agreement.
+    """
+    keywords = keywords or load_keywords()
+    load_model(model_path)
+
+    start_time = time.time()
+    classify_texts_batch_rules(texts, keywords)
+    rules_time = time.time() - start_time
+
+    start_time = time.time()
+    classify_texts_batch(texts, keywords, model_path)
+    ml_time = time.time() - start_time
+
+    labelled = label_segments(texts, keywords)
+    predicted = predict_segments(labelled['segment'], model_path)
+    segment_count = len(labelled)
+
+    report = {
+        'segments': segment_count,
+        'rules_segments_per_second': segment_count / rules_time if rules_time else float('inf'),
+        'ml_segments_per_second': segment_count / ml_time if ml_time else float('inf'),
+        'agreement': float((labelled['label'].to_numpy() == predicted).mean()) if segment_count else 1.0,
+    }
+    matched = (labelled['label'] != NO_MATCH_LABEL).to_numpy()
+    report['agreement_on_matched'] = float((labelled['label'].to_numpy()[matched] == predicted[matched]).mean()) if matched.any() else 1.0
+    return report
+
+
+if __name__ == "__main__":
+    folders = ['./pdfplumber', './pypdf2', './textract']
+    corpus = read_normalized_texts([folder for folder in folders if os.path.exists(folder)])
+    train_texts, test_texts = split_documents(corpus)
+    train_model(train_texts)
+    # Agreement is reported on held-out reports only
+    for folder in folders:
+        held_out = {doc_id: text for doc_id, text in test_texts.items()
+                    if os.path.normpath(os.path.dirname(doc_id)) == os.path.normpath(folder)}
+        if held_out:
+            print(folder, compare_backends(held_out))
@@ -0,0 +1,198 @@
+import os
+import io
+import gzip
+import tempfile
+from collections import defaultdict
+from contextlib import contextmanager
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Default write buffer for stage outputs (1 MiB)
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+# Permissions of written files: mkstemp creates 0600 temporaries, while open()
+# would honour the umask. The umask can only be read by setting it, so it is read
+# once at import rather than around every write (which would race other threads).
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+# Suffix appended to compressed intermediate files
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+# Bytes read and written per stage: logical (text) and on disk (after compression)
+IO_COUNTERS = ('bytes_read', 'bytes_written', 'disk_bytes_read', 'disk_bytes_written')
+io_stats = defaultdict(lambda: dict.fromkeys(IO_COUNTERS, 0))
+
+_current_stage = ['default']
+
+
+@contextmanager
+def io_stage(name):
+    """Attribute all reads and writes inside the block to the given stage."""
+    previous = _current_stage[0]
+    _current_stage[0] = name
+    try:
+        yield
+    finally:
+        _current_stage[0] = previous
+
+
+def reset_io_stats():
+    io_stats.clear()
+
+
+def io_report():
+    """Return the I/O bytes per stage as a plain dict."""
+    return {stage: dict(stats) for stage, stats in io_stats.items()}
+
+
+def compressed_path(path, compression=None):
+    """Path a stage output is written to for the given compression."""
+    if compression is None:
+        return path
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unsupported compression: {compression}")
+    return path + COMPRESSION_SUFFIXES[compression]
+
+
+def strip_compression_suffix(path):
+    """Return the logical path of a possibly compressed file, e.g. 'a.txt.gz' -> 'a.txt'."""
+    for suffix in COMPRESSION_SUFFIXES.values():
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return path
+
+
+def find_existing(path):
+    """Return the plain or compressed variant of path that exists on disk, or None."""
+    for candidate in [path] + [path + suffix for suffix in COMPRESSION_SUFFIXES.values()]:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def _compression_of(path):
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+    return None
+
+
+def _zstd_module():
+    if zstandard is None:
+        raise ImportError("zstd compression requires the 'zstandard' package")
+    return zstandard
+
+
+@contextmanager
+def atomic_writer(path, compression=None, buffer_size=DEFAULT_BUFFER_SIZE, encoding='utf-8', newline=None):
+    """
+    Open a buffered text stream whose content replaces path only when the block succeeds.
+
+    Data goes to a temporary file in the target directory, which is renamed over
+    the destination on success (write-then-rename), so readers never see a
+    partial file and reruns overwrite instead of appending.
+
+    Args:
+        path (str): Logical destination path (compression suffix is added automatically).
+        compression (str, optional): None, 'gzip' or 'zstd'.
+        buffer_size (int): Write buffer size in bytes.
+        encoding (str): Text encoding.
+        newline (str, optional): Passed to the text wrapper (use '' for csv).
+
+    Yields:
+        io.TextIOWrapper: Text stream to write to.
+    """
+    logical_path = path
+    path = compressed_path(path, compression)
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+
+    raw = io.FileIO(fd, 'wb')
+    if compression == 'gzip':
+        binary = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6)
+    elif compression == 'zstd':
+        binary = _zstd_module().ZstdCompressor(level=3).stream_writer(raw, closefd=False)
+    else:
+        binary = raw
+    counter = _CountingWriter(binary)
+    buffered = io.BufferedWriter(counter, buffer_size=buffer_size)
+    stream = io.TextIOWrapper(buffered, encoding=encoding, newline=newline)
+
+    try:
+        try:
+            yield stream
+            stream.flush()
+        finally:
+            # Detach the wrappers so closing them never touches the file again
+            stream.detach()
+            buffered.detach()
+        if binary is not raw:
+            binary.close()
+        os.fsync(raw.fileno())
+        raw.close()
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        raw.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Drop variants with another compression so readers never pick up stale data
+    for other in [logical_path] + [logical_path + suffix for suffix in COMPRESSION_SUFFIXES.values()]:
+        if other != path and os.path.exists(other):
+            os.remove(other)
+
+    stats = io_stats[_current_stage[0]]
+    stats['bytes_written'] += counter.count
+    stats['disk_bytes_written'] += os.path.getsize(path)
+
+
+class _CountingWriter(io.RawIOBase):
+    """Pass-through binary stream that counts the uncompressed bytes written."""
+
+    def __init__(self, target):
+        self.target = target
+        self.count = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.count += len(data)
+        self.target.write(data)
+        return len(data)
+
+
+def write_text(text, path, compression=None, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Atomically write text to path (overwriting, never appending)."""
+    with atomic_writer(path, compression=compression, buffer_size=buffer_size) as f:
+        f.write(text)
+
+
+def read_text(path):
+    """Read a text file written by atomic_writer, decompressing by suffix if needed."""
+    existing = find_existing(path)
+    if existing is None:
+        raise FileNotFoundError(path)
+
+    with open(existing, 'rb') as f:
+        data = f.read()
+    disk_size = len(data)
+
+    compression = _compression_of(existing)
+    if compression == 'gzip':
+        data = gzip.decompress(data)
+    elif compression == 'zstd':
+        data = _zstd_module().ZstdDecompressor().decompressobj().decompress(data)
+
+    stats = io_stats[_current_stage[0]]
+    stats['bytes_read'] += len(data)
+    stats['disk_bytes_read'] += disk_size
+    return data.decode('utf-8')
@@ -0,0 +1,340 @@
+import os
+import json
+import time
+import hashlib
+import inspect
+import importlib
+from collections import namedtuple
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from text_extractors import EXTRACTION_METHODS, clean_raw_text
+from normalization import extract_year_from_filename, normalize_text
+from esg_classifier import classify_text, load_keywords, save_results
+from esg_json_analyzer import count_esg_entries, write_esg_counts
+from fact_extraction import DEFAULT_FACTS_DB, store_facts
+from segment_index import DEFAULT_INDEX_DB, index_document
+from output_writer import DEFAULT_BUFFER_SIZE, IO_COUNTERS, atomic_writer, find_existing, io_report, io_stage, read_text, reset_io_stats, write_text
+
+import tabular_path  # noqa: F401 (makes the Tabular modules importable)
+from tracing import flush_trace, span
+from metrics_store import DEFAULT_DB
+
+# A pipeline stage: func is called with the values of `inputs` (job fields or
+# upstream stage names). `persist` is 'file' (saved through `save(value, path, job)`
+# and loaded through `load(path)` at `output(job)`), 'manifest' (small JSON value kept in the manifest,
+# with `output(job)` naming the database the stage fills, if any) or
+# None (kept in memory only and computed only when a downstream stage needs it).
+# `modules` names the modules implementing the stage; their source is part of its fingerprint.
+Stage = namedtuple('Stage', ['name', 'func', 'inputs', 'persist', 'output', 'save', 'load', 'modules'],
+                   defaults=((),))
+
+MANIFEST_FILE = 'pipeline_manifest.json'
+TIMINGS_FILE = 'pipeline_timings.csv'
+
+
+def save_stage_text(text, path, job):
+    write_text(text, path, compression=job['compression'], buffer_size=job['buffer_size'])
+
+
+def save_stage_json(results, path, job):
+    save_results(results, path)
+
+
+def read_json(path):
+    return json.loads(read_text(path))
+
+
+def job_path(job, suffix):
+    """Output path of a job, following the folder and suffix conventions of the notebooks."""
+    stem = os.path.splitext(os.path.basename(job['pdf_path']))[0]
+    return os.path.join(job['output_root'], job['method'].lower(), stem + suffix)
+
+
+def extract_stage(pdf_path, method):
+    return EXTRACTION_METHODS[method](pdf_path)
+
+
+def normalize_stage(clean_text, pdf_path):
+    return normalize_text(clean_text, extract_year_from_filename(os.path.basename(pdf_path)))
+
+
+def classify_stage(normalized_text):
+    return classify_text(normalized_text, load_keywords())
+
+
+def count_stage(classification):
+    return count_esg_entries(classification)
+
+
+def facts_db_path(job):
+    return os.path.join(job['output_root'], DEFAULT_FACTS_DB)
+
+
+def index_db_path(job):
+    return os.path.join(job['output_root'], DEFAULT_INDEX_DB)
+
+
+def facts_stage(normalized_text, pdf_path, method, output_root):
+    job = {'pdf_path': pdf_path, 'method': method, 'output_root': output_root}
+    stored = store_facts(job_path(job, '_normalized.txt'), normalized_text, method=method.lower(),
+                         db_path=facts_db_path(job),
+                         source_version=hashlib.sha1(normalized_text.encode()).hexdigest())
+    return {'facts': stored}
+
+
+def index_stage(normalized_text, pdf_path, method, output_root):
+    job = {'pdf_path': pdf_path, 'method': method, 'output_root': output_root}
+    indexed = index_document(job_path(job, '_normalized.txt'), normalized_text, method=method.lower(),
+                             db_path=index_db_path(job))
+    return {'segments': indexed}
+
+
+TEXT_PIPELINE = [
+    Stage('raw_text', extract_stage, ('pdf_path', 'method'), None, None, None, None,
+          ('text_extractors',)),
+    Stage('clean_text', clean_raw_text, ('raw_text',), 'file',
+          partial(job_path, suffix='.txt'), save_stage_text, read_text, ('text_extractors',)),
+    Stage('normalized_text', normalize_stage, ('clean_text', 'pdf_path'), 'file',
+          partial(job_path, suffix='_normalized.txt'), save_stage_text, read_text, ('normalization',)),
+    Stage('classification', classify_stage, ('normalized_text',), 'file',
+          partial(job_path, suffix='_classification_results.json'), save_stage_json, read_json, ('esg_classifier',)),
+    Stage('esg_counts', count_stage, ('classification',), 'manifest', None, None, None, ('esg_json_analyzer',)),
+    Stage('facts', facts_stage, ('normalized_text', 'pdf_path', 'method', 'output_root'), 'manifest',
+          facts_db_path, None, None, ('fact_extraction',)),
+    Stage('segment_index', index_stage, ('normalized_text', 'pdf_path', 'method', 'output_root'), 'manifest',
+          index_db_path, None, None, ('segment_index', 'esg_classifier')),
+]
+
+
+def code_fingerprint(func, modules=()):
+    """
+    Hash of a stage's code: the source of its function and of the modules implementing it.
+
+    Decorated functions are unwrapped first, so a @traced stage is fingerprinted
+    by its own code rather than by the tracing wrapper.
+
+    Args:
+        func (callable): Stage function.
+        modules (tuple): Names of the modules whose edits invalidate the stage.
+
+    Returns:
+        str: Hex digest.
+    """
+    func = inspect.unwrap(func)
+    try:
+        source = inspect.getsource(func).encode()
+    except (TypeError, OSError):
+        source = func.__code__.co_code
+    for module in modules:
+        source += Path(inspect.getsourcefile(importlib.import_module(module))).read_bytes()
+    return hashlib.sha1(source + func.__name__.encode()).hexdigest()
+
+
+def stage_fingerprints(job, stages):
+    """
+    Compute the fingerprint of every stage of a job without running anything.
+
+    A stage fingerprint combines its code with the fingerprints of its inputs,
+    so a change anywhere upstream changes every downstream fingerprint.
+
+    Args:
+        job (dict): Job fields ('pdf_path', 'method', 'output_root').
+        stages (list): Stages in topological order.
+
+    Returns:
+        dict: Stage name to fingerprint.
+    """
+    stat = os.stat(job['pdf_path'])
+    fingerprints = {
+        'pdf_path': f"{job['pdf_path']}:{stat.st_size}:{stat.st_mtime_ns}",
+        'method': job['method'],
+        'output_root': job['output_root'],
+    }
+    for stage in stages:
+        parts = [code_fingerprint(stage.func, stage.modules)] + [fingerprints[name] for name in stage.inputs]
+        fingerprints[stage.name] = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+    return {stage.name: fingerprints[stage.name] for stage in stages}
+
+
+def run_job(job, stages, previous):
+    """
+    Run the stages of one document, reusing everything whose fingerprint is unchanged.
+
+    Args:
+        job (dict): Job fields ('pdf_path', 'method', 'output_root', 'compression', 'buffer_size').
+        stages (list): Stages in topological order.
+        previous (dict): Manifest entry of this job from the last run.
+
+    Returns:
+        dict: New manifest entry, per-stage timings and the error message if a stage failed.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    fingerprints = stage_fingerprints(job, stages)
+    previous_fingerprints = previous.get('fingerprints', {})
+    values = dict(job)
+    entry = {'fingerprints': {}, 'values': {}}
+    timings = []
+    reset_io_stats()
+
+    def is_current(stage):
+        if previous_fingerprints.get(stage.name) != fingerprints[stage.name]:
+            return False
+        if stage.persist == 'file':
+            return find_existing(stage.output(job)) is not None
+        if stage.persist != 'manifest' or stage.name not in previous.get('values', {}):
+            return False
+        # A stage filling a database reruns when the database was deleted
+        return stage.output is None or os.path.exists(stage.output(job))
+
+    def resolve(name):
+        if name in values:
+            return values[name]
+        stage = by_name[name]
+        if is_current(stage):
+            start_time = time.time()
+            with io_stage(name):
+                value = stage.load(stage.output(job)) if stage.persist == 'file' else previous['values'][name]
+            status = 'cached'
+        else:
+            inputs = [resolve(input_name) for input_name in stage.inputs]
+            start_time = time.time()
+            with io_stage(name), span(f'pipeline.{name}', file=os.path.basename(job['pdf_path']), method=job['method']):
+                value = stage.func(*inputs)
+                if stage.persist == 'file':
+                    stage.save(value, stage.output(job), job)
+            status = 'run'
+        timings.append({'stage': name, 'status': status, 'seconds': time.time() - start_time})
+        values[name] = value
+        return value
+
+    error = None
+    for stage in stages:
+        if not stage.persist:
+            continue
+        if is_current(stage):
+            # Only load a cached value when it is needed by something downstream
+            entry['fingerprints'][stage.name] = fingerprints[stage.name]
+            if stage.persist == 'manifest':
+                entry['values'][stage.name] = previous['values'][stage.name]
+            timings.append({'stage': stage.name, 'status': 'skipped', 'seconds': 0.0})
+            continue
+        try:
+            value = resolve(stage.name)
+        except Exception as e:
+            error = f"{stage.name}: {e}"
+            print(f"Error processing {job['pdf_path']} with {job['method']} in stage {error}")
+            break
+        entry['fingerprints'][stage.name] = fingerprints[stage.name]
+        if stage.persist == 'manifest':
+            entry['values'][stage.name] = value
+
+    # Pool workers exit without running atexit handlers
+    flush_trace()
+    io_bytes = io_report()
+    for timing in timings:
+        # Skipped stages did no I/O; their counters are still reported so every row has them
+        timing.update(io_bytes.get(timing['stage'], dict.fromkeys(IO_COUNTERS, 0)))
+    return {'entry': entry, 'timings': timings, 'error': error}
+
+
+def load_manifest(manifest_path):
+    if os.path.exists(manifest_path):
+        return read_json(manifest_path)
+    return {}
+
+
+def run_pipeline(input_folder, output_root='.', methods=None, stages=None, max_workers=None,
+                 compression=None, buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    Run the textual pipeline (extraction -> cleaning -> normalization -> classification -> counts, facts, segment index).
+
+    Every (PDF, method) pair is an independent job; jobs run concurrently in a
+    process pool and pass data between stages in memory. Stages whose inputs
+    and code are unchanged since the last run are skipped, and the ESG counts
+    CSV is only rewritten when at least one job changed.
+
+    Args:
+        input_folder (str): Folder containing the PDFs.
+        output_root (str): Folder holding the per-method output folders.
+        methods (list, optional): Extraction methods to run. Defaults to all.
+        stages (list, optional): Stage list. Defaults to TEXT_PIPELINE.
+        max_workers (int, optional): Worker processes; 1 runs everything in-process.
+        compression (str, optional): None, 'gzip' or 'zstd' for the intermediate text files.
+        buffer_size (int): Write buffer size for stage outputs.
+
+    Returns:
+        pd.DataFrame: Per-job, per-stage timings and I/O bytes.
+    """
+    stages = stages or TEXT_PIPELINE
+    methods = methods or list(EXTRACTION_METHODS)
+    manifest_path = os.path.join(output_root, MANIFEST_FILE)
+    manifest = load_manifest(manifest_path)
+
+    jobs = [
+        {'pdf_path': str(pdf_file), 'method': method, 'output_root': output_root,
+         'compression': compression, 'buffer_size': buffer_size}
+        for pdf_file in sorted(Path(input_folder).glob('*.pdf'))
+        for method in methods
+    ]
+
+    results = {}
+    if max_workers == 1:
+        for job in jobs:
+            key = f"{job['method']}:{job['pdf_path']}"
+            results[key] = run_job(job, stages, manifest.get(key, {}))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for job in jobs:
+                key = f"{job['method']}:{job['pdf_path']}"
+                futures[executor.submit(run_job, job, stages, manifest.get(key, {}))] = key
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+
+    timings = []
+    changed = False
+    for job in jobs:
+        key = f"{job['method']}:{job['pdf_path']}"
+        result = results[key]
+        changed = changed or any(t['status'] == 'run' for t in result['timings'])
+        manifest[key] = result['entry']
+        for timing in result['timings']:
+            timings.append({'Filename': os.path.basename(job['pdf_path']), 'Extraction Method': job['method'], **timing})
+
+    counts_path = os.path.join(output_root, 'esg_counts.csv')
+    if changed or not os.path.exists(counts_path):
+        start_time = time.time()
+        rows = []
+        for job in jobs:
+            counts = manifest[f"{job['method']}:{job['pdf_path']}"]['values'].get('esg_counts')
+            if counts is None:
+                continue
+            rows.append({
+                'Folder': job['method'].lower(),
+                'Filename': os.path.basename(job_path(job, '_classification_results.json')),
+                'Social_Count': counts['Social'],
+                'Environmental_Count': counts['Environmental'],
+                'Governance_Count': counts['Governance']
+            })
+        # The dashboard reads the CSV and the metrics store relative to output_root
+        write_esg_counts(rows, counts_path, metrics_db=os.path.join(output_root, DEFAULT_DB))
+        timings.append({'Filename': None, 'Extraction Method': None, 'stage': 'esg_counts_csv',
+                        'status': 'run', 'seconds': time.time() - start_time})
+
+    with atomic_writer(manifest_path) as f:
+        json.dump(manifest, f, indent=1)
+
+    timings_df = pd.DataFrame(timings)
+    with atomic_writer(os.path.join(output_root, TIMINGS_FILE), newline='') as f:
+        timings_df.to_csv(f, index=False)
+    print(f"Pipeline finished, stage timings saved to {os.path.join(output_root, TIMINGS_FILE)}")
+    return timings_df
+
+
+if __name__ == "__main__":
+    stage_timings = run_pipeline("../ESG REPORTS")
+    print(stage_timings.groupby(['stage', 'status'])[['seconds', 'bytes_read', 'bytes_written']].sum())
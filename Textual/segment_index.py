@@ -0,0 +1,258 @@
+import os
+import re
+import hashlib
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from output_writer import read_text, strip_compression_suffix
+from esg_classifier import TIE_ORDER, build_segment_table, classify_segments, load_keywords
+from esg_json_analyzer import company_and_year
+
+import tabular_path  # noqa: F401 (makes the Tabular modules importable)
+from tracing import traced
+
+DEFAULT_INDEX_DB = 'segment_index.db'
+
+# Category stored for segments the classifier assigns to every tied category
+TIE_CATEGORY = 'Tie'
+
+# Words (letters/digits, inner hyphens and apostrophes kept) of at least two characters
+_TERM = re.compile(r"[^\W_]{2,}(?:[-'][^\W_]+)*|[^\W_](?:[-'][^\W_]+)+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    method TEXT,
+    company TEXT,
+    year INTEGER,
+    source_version TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    doc_id INTEGER NOT NULL REFERENCES documents(doc_id),
+    segment_idx INTEGER NOT NULL,
+    source_offset INTEGER NOT NULL,
+    category TEXT,
+    text TEXT NOT NULL,
+    PRIMARY KEY (doc_id, segment_idx)
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    segment_idx INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id, segment_idx)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings(doc_id);
+CREATE INDEX IF NOT EXISTS idx_segments_category ON segments(category, doc_id);
+CREATE INDEX IF NOT EXISTS idx_documents_company_year ON documents(company, year);
+"""
+
+
+def connect(db_path=DEFAULT_INDEX_DB):
+    """Open (and create if needed) the index in WAL mode so pipeline workers can add documents concurrently."""
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=60)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def terms_of(text):
+    """Distinct lower-case terms of a text, in the form used by the index and by queries."""
+    return set(_TERM.findall(text.lower()))
+
+
+@traced('index.segments')
+def document_segments(text, keywords=None):
+    """
+    Split a normalized text like the classifier does and label every segment.
+
+    Args:
+        text (str): Normalized text.
+        keywords (dict, optional): ESG keywords. Defaults to load_keywords().
+
+    Returns:
+        pd.DataFrame: Non-empty segments with 'segment_idx', 'source_offset',
+        'category' (TIE_CATEGORY for ties, None when unclassified) and 'text'.
+    """
+    table = build_segment_table({0: text})
+    # Every separator is one character, so offsets follow from the segment lengths
+    lengths = table['segment'].str.len().to_numpy()
+    table['source_offset'] = np.concatenate([[0], np.cumsum(lengths + 1)[:-1]])
+
+    classified = classify_segments(table, keywords or load_keywords())
+    table['category'] = None
+    table.loc[classified.index, 'category'] = classified['category'].fillna(TIE_CATEGORY)
+
+    # Keep the offset of the stripped text so it points at the first word
+    leading = table['segment'].str.len() - table['segment'].str.lstrip().str.len()
+    table['source_offset'] += leading
+    table['text'] = table['segment'].str.strip()
+    table = table[table['text'] != '']
+    return table[['segment_idx', 'source_offset', 'category', 'text']]
+
+
+def index_document(path, text=None, method=None, keywords=None, db_path=DEFAULT_INDEX_DB, source_version=None):
+    """
+    Add one normalized document to the index, replacing its previous postings.
+
+    Args:
+        path (str): Normalized text path ('<Company>_<year>..._normalized.txt').
+        text (str, optional): Its content; read from path when omitted.
+        method (str, optional): Extraction method (output folder) the text came from.
+        keywords (dict, optional): ESG keywords used to label segments.
+        db_path (str): Index database path.
+        source_version (str, optional): Identity of the content; defaults to its hash.
+            Documents whose version is unchanged are skipped.
+
+    Returns:
+        int: Number of segments indexed, or None when the document was unchanged.
+    """
+    if text is None:
+        text = read_text(path)
+    if source_version is None:
+        source_version = hashlib.sha1(text.encode()).hexdigest()
+    company, year = company_and_year(os.path.basename(strip_compression_suffix(path)))
+    year = int(year) if year else None
+
+    # The CLI and the pipeline name the same file differently ('./pypdf2/x.txt',
+    # 'out/pypdf2/x.txt'); keying on the absolute path indexes it once
+    key = os.path.abspath(path)
+    conn = connect(db_path)
+    try:
+        row = conn.execute('SELECT doc_id, source_version FROM documents WHERE path = ?', (key,)).fetchone()
+        if row and row[1] == source_version:
+            return None
+
+        segments = document_segments(text, keywords)
+        with conn:
+            if row:
+                doc_id = row[0]
+                conn.execute('DELETE FROM postings WHERE doc_id = ?', (doc_id,))
+                conn.execute('DELETE FROM segments WHERE doc_id = ?', (doc_id,))
+                conn.execute('UPDATE documents SET method = ?, company = ?, year = ?, source_version = ? WHERE doc_id = ?',
+                             (method, company, year, source_version, doc_id))
+            else:
+                doc_id = conn.execute(
+                    'INSERT INTO documents (path, method, company, year, source_version) VALUES (?, ?, ?, ?, ?)',
+                    (key, method, company, year, source_version)
+                ).lastrowid
+
+            rows = list(segments.itertuples(index=False))
+            conn.executemany(
+                'INSERT INTO segments VALUES (?, ?, ?, ?, ?)',
+                [(doc_id, int(idx), int(offset), category, segment) for idx, offset, category, segment in rows]
+            )
+            conn.executemany(
+                'INSERT INTO postings VALUES (?, ?, ?)',
+                ((term, doc_id, int(idx)) for idx, _, _, segment in rows for term in terms_of(segment))
+            )
+    finally:
+        conn.close()
+    return len(segments)
+
+
+def index_directories(directories, db_path=DEFAULT_INDEX_DB):
+    """
+    Index every '_normalized.txt' file in the given directories (unchanged documents are skipped).
+
+    Args:
+        directories (list): Directories containing normalized text files (one per method).
+        db_path (str): Index database path.
+
+    Returns:
+        dict: Path to the number of segments indexed (None for unchanged documents).
+    """
+    keywords = load_keywords()
+    counts = {}
+    for directory_path in directories:
+        method = os.path.basename(os.path.normpath(directory_path))
+        for filename in sorted(os.listdir(directory_path)):
+            logical_name = strip_compression_suffix(filename)
+            if logical_name.endswith('_normalized.txt'):
+                path = os.path.join(directory_path, logical_name)
+                counts[path] = index_document(path, method=method, keywords=keywords, db_path=db_path)
+    return counts
+
+
+def _term_clause(term):
+    """SQL condition and parameters for one query term; 'decarbon*' matches by prefix."""
+    term = term.lower()
+    if term.endswith('*'):
+        prefix = term[:-1]
+        # A range keeps the lookup on the term index
+        return 'term >= ? AND term < ?', [prefix, prefix + '\U0010ffff']
+    return 'term = ?', [term]
+
+
+def search(query=None, categories=None, companies=None, years=None, method=None, limit=100,
+           db_path=DEFAULT_INDEX_DB):
+    """
+    Find the segments containing every term of a query.
+
+    Args:
+        query (str, optional): Terms that must all occur in a segment; a trailing '*'
+            matches by prefix. Without a query, segments are selected by the filters alone.
+        categories (list, optional): Only segments of these ESG categories. Tied
+            segments count for every category in TIE_ORDER, as in the classification files.
+        companies (list, optional): Only these companies.
+        years (list, optional): Only these years.
+        method (str, optional): Only documents from this extraction method.
+        limit (int, optional): Maximum number of segments returned (None for all).
+        db_path (str): Index database path.
+
+    Returns:
+        pd.DataFrame: company, year, method, path, segment_idx, source_offset, category and text.
+    """
+    clauses, params = [], []
+    if query:
+        terms = sorted({term for word in query.split() for term in ([word.lower()] if word.endswith('*') else terms_of(word))})
+        # Each term's postings come from one range scan of the term index; the
+        # segments containing all terms are the intersection of those sets
+        postings = []
+        for term in terms:
+            condition, term_params = _term_clause(term)
+            postings.append(f"SELECT doc_id, segment_idx FROM postings WHERE {condition}")
+            params.extend(term_params)
+        clauses.append(f"(s.doc_id, s.segment_idx) IN ({' INTERSECT '.join(postings) or 'SELECT NULL, NULL'})")
+    if categories is not None:
+        categories = list(categories)
+        if any(category in TIE_ORDER for category in categories):
+            categories.append(TIE_CATEGORY)
+        clauses.append(f"s.category IN ({', '.join('?' * len(categories))})" if categories else '0')
+        params.extend(categories)
+    for column, values in (('d.company', companies), ('d.year', years)):
+        if values is not None:
+            values = list(values)
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})" if values else '0')
+            params.extend(values)
+    if method is not None:
+        clauses.append('d.method = ?')
+        params.append(method)
+
+    where = (' WHERE ' + ' AND '.join(clauses)) if clauses else ''
+    sql = ('SELECT d.company, d.year, d.method, d.path, s.segment_idx, s.source_offset, s.category, s.text '
+           f'FROM segments s JOIN documents d ON d.doc_id = s.doc_id{where} '
+           'ORDER BY d.company, d.year, d.path, s.segment_idx')
+    if limit is not None:
+        sql += f' LIMIT {int(limit)}'
+
+    conn = connect(db_path)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def term_counts(query, db_path=DEFAULT_INDEX_DB):
+    """Number of matching segments per company, year and method for a query."""
+    hits = search(query, limit=None, db_path=db_path)
+    return hits.groupby(['company', 'year', 'method']).size().rename('segments').reset_index()
+
+
+if __name__ == "__main__":
+    index_directories(['./pypdf2', './pdfplumber', './textract'])
+    print(search('decarbonisation'))
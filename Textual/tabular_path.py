@@ -0,0 +1,15 @@
+"""
+Make the table toolkit's modules importable from the textual modules.
+
+The tracing layer, the metrics store and the job ledger live in ../Tabular and
+are shared by both toolkits. Importing this module puts that folder on sys.path
+once, whether the textual modules run as scripts, from the notebooks or through
+esg_extract.py.
+"""
+import os
+import sys
+
+TABULAR_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Tabular'))
+
+if TABULAR_DIR not in sys.path:
+    sys.path.append(TABULAR_DIR)
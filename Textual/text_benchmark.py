@@ -0,0 +1,159 @@
+import os
+import sys
+import time
+import multiprocessing
+from pathlib import Path
+
+import pandas as pd
+
+from output_writer import read_text
+from normalization import count_year_references
+from text_extractors import EXTRACTION_METHODS, TEXT_BACKENDS, save_clean_text, text_output_path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCHMARK_FILE = 'text_backend_benchmark.csv'
+SUMMARY_FILE = 'text_backend_summary.csv'
+
+
+def peak_memory_mb():
+    """
+    Peak resident memory of this process and of the subprocesses it waited for, in MB.
+
+    Benchmark jobs run in a fresh process each, so this is the peak of one job.
+    textract's pdftotext runs as a subprocess and is covered by RUSAGE_CHILDREN.
+    """
+    if resource is None:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def benchmark_job(job):
+    """
+    Run one (pdf, backend) pair and measure it; failures are reported in the row.
+
+    Args:
+        job (tuple): (pdf_path, method_name, output_folder).
+
+    Returns:
+        dict: Row with the extracted characters, time, memory and year references.
+    """
+    pdf_path, method_name, output_folder = job
+    row = {'Filename': os.path.basename(pdf_path), 'Extraction Method': method_name,
+           'extracted_text_length': None, 'year_references': None, 'error': None}
+    baseline = peak_memory_mb()
+    start_time = time.perf_counter()
+    try:
+        extracted_text = EXTRACTION_METHODS[method_name](pdf_path)
+        row['extraction_time'] = time.perf_counter() - start_time
+        # Cleaning and saving are the same for every backend and are not timed
+        row['extracted_text_length'] = len(extracted_text)
+        save_clean_text(pdf_path, extracted_text, output_folder)
+        row['year_references'] = count_year_references(read_text(text_output_path(pdf_path, output_folder)))
+    except Exception as e:
+        row['extraction_time'] = time.perf_counter() - start_time
+        row['error'] = f"{type(e).__name__}: {e}"
+    row['baseline_memory_mb'] = baseline
+    row['peak_memory_mb'] = peak_memory_mb()
+    return row
+
+
+def summarize_benchmark(results):
+    """
+    Side-by-side comparison of the backends over the corpus.
+
+    The year hit rate is the share of year references a backend's text yields
+    out of the most any backend yields for the same PDF, so a backend that
+    merges or drops words around 'last year' or '31/12/2021' scores lower.
+
+    Args:
+        results (pd.DataFrame): Rows returned by benchmark_job.
+
+    Returns:
+        pd.DataFrame: One row per backend.
+    """
+    ok = results[results['error'].isna()].copy()
+    best = ok.groupby('Filename')['year_references'].transform('max')
+    ok['best_year_references'] = best
+    summary = ok.groupby('Extraction Method').agg(
+        documents=('Filename', 'count'),
+        characters=('extracted_text_length', 'sum'),
+        seconds=('extraction_time', 'sum'),
+        peak_memory_mb=('peak_memory_mb', 'max'),
+        median_peak_memory_mb=('peak_memory_mb', 'median'),
+        year_references=('year_references', 'sum'),
+        best_year_references=('best_year_references', 'sum'),
+    )
+    # Backends whose every job failed still get a row
+    summary = summary.reindex(results['Extraction Method'].unique())
+    summary['chars_per_second'] = summary['characters'] / summary['seconds']
+    summary['year_hit_rate'] = summary['year_references'] / summary['best_year_references']
+    summary['failed'] = results[results['error'].notna()].groupby('Extraction Method').size()
+    summary['failed'] = summary['failed'].fillna(0).astype(int)
+    summary['documents'] = summary['documents'].fillna(0).astype(int)
+    columns = ['documents', 'failed', 'characters', 'chars_per_second', 'peak_memory_mb',
+               'median_peak_memory_mb', 'year_references', 'year_hit_rate']
+    return summary.reindex(columns=columns).rename_axis('Extraction Method').reset_index()
+
+
+def benchmark_backends(input_folder, methods=None, max_workers=None, output_root='benchmark',
+                       output_dir='performance_metrics'):
+    """
+    Benchmark the text backends side by side on every PDF of a folder.
+
+    Every (pdf, backend) pair runs in its own worker process that exits after
+    the job, so peak memory is measured per job from the OS instead of a
+    sampling thread, and a backend that crashes or leaks cannot affect the
+    others. Jobs run max_workers at a time.
+
+    Args:
+        input_folder (str): Folder containing the PDFs.
+        methods (list, optional): Backends to compare (keys of TEXT_BACKENDS). Defaults to all.
+        max_workers (int, optional): Concurrent jobs. Defaults to the number of CPUs.
+        output_root (str): Folder receiving '<method>/<pdf name>.txt' for every backend.
+        output_dir (str): Folder for the per-job and summary CSVs.
+
+    Returns:
+        pd.DataFrame: One row per backend with documents, failures, chars per second,
+        peak memory and year hit rate.
+    """
+    unknown = set(methods or []) - set(TEXT_BACKENDS)
+    if unknown:
+        raise ValueError(f"Unknown extraction methods: {sorted(unknown)}")
+    method_names = [method_name for method_name in TEXT_BACKENDS if methods is None or method_name in methods]
+
+    jobs = [
+        (str(pdf_file), method_name, os.path.join(output_root, method_name.lower()))
+        for pdf_file in sorted(Path(input_folder).glob('*.pdf'))
+        for method_name in method_names
+    ]
+
+    # spawn gives every job a clean interpreter on all platforms
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes=max_workers, maxtasksperchild=1) as pool:
+        rows = []
+        for row in pool.imap_unordered(benchmark_job, jobs):
+            status = row['error'] or f"{row['extracted_text_length']} chars in {row['extraction_time']:.2f}s"
+            print(f"{row['Filename']} with {row['Extraction Method']}: {status}")
+            rows.append(row)
+
+    results = pd.DataFrame(rows).sort_values(['Filename', 'Extraction Method']).reset_index(drop=True)
+    summary = summarize_benchmark(results)
+
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    results.to_csv(os.path.join(output_dir, BENCHMARK_FILE), index=False)
+    summary.to_csv(os.path.join(output_dir, SUMMARY_FILE), index=False)
+    print(f"Benchmark saved to {os.path.join(output_dir, BENCHMARK_FILE)} and {os.path.join(output_dir, SUMMARY_FILE)}")
+    return summary
+
+
+if __name__ == "__main__":
+    print(benchmark_backends("../ESG REPORTS").to_string(index=False))
@@ -0,0 +1,94 @@
+import os
+import re
+from output_writer import write_text
+
+import tabular_path  # noqa: F401 (makes the Tabular modules importable)
+from tracing import span, traced
+
+
+@traced('text.extract.pypdf2')
+def extract_with_pypdf2(pdf_path):
+    import PyPDF2  # imported on first use so other backends start fast
+    with open(pdf_path, 'rb') as pdf_file:
+        reader = PyPDF2.PdfReader(pdf_file)
+        return "".join(page.extract_text() for page in reader.pages)
+
+
+@traced('text.extract.pdfplumber')
+def extract_with_pdfplumber(pdf_path):
+    import pdfplumber
+    with pdfplumber.open(pdf_path) as pdf:
+        return "".join(page.extract_text() or "" for page in pdf.pages)
+
+
+@traced('text.extract.textract')
+def extract_text_from_pdf(pdf_path):
+    import textract
+    # textract runs pdftotext in a subprocess; errors are left to the caller so
+    # the job ledger records and retries them
+    return textract.process(pdf_path).decode('utf-8')
+
+
+@traced('text.clean')
+def clean_raw_text(text):
+    """
+    Clean extracted text without writing it anywhere
+
+    Args:
+        text (str): Raw extracted text
+
+    Returns:
+        str: Cleaned text
+    """
+    # Remove extra whitespaces
+    text = re.sub(r'\s+', ' ', text).strip()
+
+    # Remove page numbers, headers, footers
+    text = re.sub(r'\d+\s*[\|\-]\s*\d+', '', text)
+
+    return text
+
+
+def text_output_path(pdf_path, output_folder):
+    """Path of the cleaned text a single-file backend writes for a PDF."""
+    return os.path.join(output_folder, os.path.splitext(os.path.basename(pdf_path))[0] + ".txt")
+
+
+def save_clean_text(pdf_path, raw_text, output_folder, compression=None):
+    """Clean the raw text of a PDF, save it to output_folder and report its length."""
+    with span('text.save', file=os.path.basename(pdf_path)):
+        write_text(clean_raw_text(raw_text), text_output_path(pdf_path, output_folder), compression=compression)
+    return {os.path.basename(pdf_path): len(raw_text)}
+
+
+def extract_with_pypdf2_single(pdf_path, output_folder='pypdf2', compression=None):
+    """Extract, clean and save the text of a single PDF using PyPDF2."""
+    return save_clean_text(pdf_path, extract_with_pypdf2(pdf_path), output_folder, compression)
+
+
+def extract_with_pdfplumber_single(pdf_path, output_folder='pdfplumber', compression=None):
+    """Extract, clean and save the text of a single PDF using pdfplumber."""
+    return save_clean_text(pdf_path, extract_with_pdfplumber(pdf_path), output_folder, compression)
+
+
+def extract_with_textract_single(pdf_path, output_folder='textract', compression=None):
+    """Extract, clean and save the text of a single PDF using textract."""
+    return save_clean_text(pdf_path, extract_text_from_pdf(pdf_path), output_folder, compression)
+
+
+# Raw text extraction by method name (pdf_path -> text), used by the pipeline
+EXTRACTION_METHODS = {
+    "PyPDF2": extract_with_pypdf2,
+    "PDFPlumber": extract_with_pdfplumber,
+    "Textract": extract_text_from_pdf,
+}
+
+# Single-file backends by method name, with the interface of the table
+# backends: (pdf_path, output_folder) -> {filename: extracted characters}.
+# Each writes '<output_folder>/<pdf name>.txt'; the folder defaults to the
+# lower-case method name the notebooks and the dashboard use.
+TEXT_BACKENDS = {
+    "PyPDF2": extract_with_pypdf2_single,
+    "PDFPlumber": extract_with_pdfplumber_single,
+    "Textract": extract_with_textract_single,
+}
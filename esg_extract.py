@@ -0,0 +1,259 @@
+"""
+Command line entry point for the ESG toolkit.
+
+    python esg_extract.py tables "ESG REPORTS" --methods Camelot
+    python esg_extract.py tables "ESG REPORTS" --resume
+    python esg_extract.py consensus
+    python esg_extract.py text "ESG REPORTS" --methods PyPDF2 --workers 4
+    python esg_extract.py text-benchmark "ESG REPORTS"
+    python esg_extract.py normalize Textual/pypdf2
+    python esg_extract.py classify Textual/pypdf2 --backend rules
+    python esg_extract.py facts Textual/pypdf2 --metric "Scope 1 emissions" --unit "MT CO₂e"
+    python esg_extract.py search "emission* scope" --category Environmental --company Acme
+    python esg_extract.py pipeline "ESG REPORTS" --output-root Textual
+    python esg_extract.py viz --incremental
+    python esg_extract.py startup
+
+Only the standard library is imported up front; each command imports the
+modules (and extraction backends) it needs when it runs.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+TABULAR_DIR = os.path.join(ROOT, 'Tabular')
+TEXTUAL_DIR = os.path.join(ROOT, 'Textual')
+
+TABLE_METHODS = ['Tabula', 'Camelot', 'PDFPlumber']
+TEXT_METHODS = ['PyPDF2', 'PDFPlumber', 'Textract']
+
+# Modules timed by the startup benchmark, per command
+STARTUP_IMPORTS = {
+    'tables (Tabula)': (TABULAR_DIR, 'tabula_extractor'),
+    'tables (Camelot)': (TABULAR_DIR, 'camelot_extractor'),
+    'tables (PDFPlumber)': (TABULAR_DIR, 'pdfplumber_extractor'),
+    'tables (coordinator)': (TABULAR_DIR, 'table_extraction'),
+    'consensus': (TABULAR_DIR, 'table_consensus'),
+    'text': (TEXTUAL_DIR, 'extraction_cleaning'),
+    'text-benchmark': (TEXTUAL_DIR, 'text_benchmark'),
+    'normalize': (TEXTUAL_DIR, 'normalization'),
+    'classify': (TEXTUAL_DIR, 'esg_classifier'),
+    'facts': (TEXTUAL_DIR, 'fact_extraction'),
+    'search': (TEXTUAL_DIR, 'segment_index'),
+    'viz': (TABULAR_DIR, 'Visualization'),
+}
+
+
+def use_directory(directory):
+    """Make the flat modules of a toolkit folder importable."""
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+
+
+def run_tables(args):
+    use_directory(TABULAR_DIR)
+    from table_extraction import extract_tables
+    print(extract_tables(args.input_folder, args.performance_file, methods=args.methods, resume=args.resume))
+
+
+def run_consensus(args):
+    use_directory(TABULAR_DIR)
+    from table_consensus import build_consensus
+    summary = build_consensus(output_folder=args.output_folder)
+    if not summary.empty:
+        print(summary.groupby('Backends')['Agreement'].agg(['count', 'mean']))
+
+
+def run_text(args):
+    use_directory(TEXTUAL_DIR)
+    from extraction_cleaning import process_pdf_directory
+    print(process_pdf_directory(args.input_folder, args.performance_file, methods=args.methods, resume=args.resume,
+                                max_workers=args.workers or None))
+
+
+def run_text_benchmark(args):
+    use_directory(TEXTUAL_DIR)
+    from text_benchmark import benchmark_backends
+    summary = benchmark_backends(args.input_folder, methods=args.methods, max_workers=args.workers,
+                                 output_root=args.output_root)
+    print(summary.to_string(index=False))
+
+
+def run_normalize(args):
+    use_directory(TEXTUAL_DIR)
+    from normalization import process_cleaned_directory
+    for directory in args.directories:
+        process_cleaned_directory(directory, compression=args.compression, index_db=args.index_db)
+
+
+def run_classify(args):
+    use_directory(TEXTUAL_DIR)
+    from esg_classifier import classify_directories
+    classify_directories(args.directories, backend=args.backend)
+
+
+def run_facts(args):
+    use_directory(TEXTUAL_DIR)
+    from fact_extraction import extract_facts_from_directories, metric_by_company_year
+    if args.directories:
+        extract_facts_from_directories(args.directories, db_path=args.db)
+    if args.metric:
+        print(metric_by_company_year(args.metric, unit=args.unit, db_path=args.db))
+
+
+def run_search(args):
+    use_directory(TEXTUAL_DIR)
+    from segment_index import index_directories, search
+    if args.index:
+        index_directories(args.index, db_path=args.db)
+    hits = search(args.query, categories=args.category, companies=args.company, years=args.year,
+                  method=args.method, limit=args.limit, db_path=args.db)
+    for row in hits.itertuples():
+        print(f"{row.company} {row.year} [{row.method}, {row.category}, offset {row.source_offset}] {row.text}")
+    print(f"{len(hits)} segments")
+
+
+def run_pipeline(args):
+    use_directory(TEXTUAL_DIR)
+    from pipeline import run_pipeline as run
+    timings = run(args.input_folder, args.output_root, methods=args.methods,
+                  max_workers=args.workers, compression=args.compression)
+    print(timings.groupby(['stage', 'status'])['seconds'].agg(['count', 'sum']))
+
+
+def run_viz(args):
+    use_directory(TABULAR_DIR)
+    import matplotlib
+    matplotlib.use('Agg')
+    from Visualization import analyze_extraction_performance, analyze_extraction_performance_incremental
+    if args.incremental:
+        result = analyze_extraction_performance_incremental(args.performance_csv, max_workers=args.workers)
+        print(f"Re-rendered {len(result['rendered'])} of {len(result['visualizations'])} figures")
+    else:
+        result = analyze_extraction_performance(args.performance_csv)
+    print(result['summary_statistics'])
+
+
+def time_command(command, repeat):
+    """Median wall time in milliseconds of running command in a fresh interpreter."""
+    samples = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        samples.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(samples)
+
+
+def run_startup(args):
+    """Compare interpreter, CLI and per-command import times in fresh processes."""
+    rows = [
+        ('python (baseline)', time_command([sys.executable, '-c', 'pass'], args.repeat)),
+        ('esg_extract.py --help', time_command([sys.executable, os.path.abspath(__file__), '--help'], args.repeat)),
+    ]
+    for label, (directory, module) in STARTUP_IMPORTS.items():
+        code = f"import sys; sys.path.insert(0, {directory!r}); import {module}"
+        check = subprocess.run([sys.executable, '-c', code], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if check.returncode != 0:
+            rows.append((f"import {module} [{label}]", None))
+            continue
+        rows.append((f"import {module} [{label}]", time_command([sys.executable, '-c', code], args.repeat)))
+
+    width = max(len(label) for label, _ in rows)
+    print(f"{'Startup step':<{width}}  median ms ({args.repeat} runs)")
+    for label, ms in rows:
+        print(f"{label:<{width}}  {'import failed' if ms is None else f'{ms:.1f}'}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='esg-extract', description='ESG report extraction toolkit')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    tables = commands.add_parser('tables', help='extract tables from PDFs')
+    tables.add_argument('input_folder')
+    tables.add_argument('--methods', nargs='+', choices=TABLE_METHODS)
+    tables.add_argument('--performance-file', default='table_extraction_performance.csv')
+    tables.add_argument('--resume', action='store_true', help='skip jobs finished by an earlier run of this folder')
+    tables.set_defaults(func=run_tables)
+
+    consensus = commands.add_parser('consensus', help='merge the tables of all backends into one table per region')
+    consensus.add_argument('--output-folder', default='consensus')
+    consensus.set_defaults(func=run_consensus)
+
+    text = commands.add_parser('text', help='extract and clean text from PDFs')
+    text.add_argument('input_folder')
+    text.add_argument('--methods', nargs='+', choices=TEXT_METHODS)
+    text.add_argument('--performance-file', default='extraction_performance.csv')
+    text.add_argument('--resume', action='store_true', help='skip jobs finished by an earlier run of this folder')
+    text.add_argument('--workers', type=int, default=1, help='worker processes (0 for one per CPU)')
+    text.set_defaults(func=run_text)
+
+    text_benchmark = commands.add_parser('text-benchmark', help='compare the text backends side by side')
+    text_benchmark.add_argument('input_folder')
+    text_benchmark.add_argument('--methods', nargs='+', choices=TEXT_METHODS)
+    text_benchmark.add_argument('--workers', type=int)
+    text_benchmark.add_argument('--output-root', default='benchmark', help='folder for the extracted text of every backend')
+    text_benchmark.set_defaults(func=run_text_benchmark)
+
+    normalize = commands.add_parser('normalize', help='normalize cleaned text files')
+    normalize.add_argument('directories', nargs='+')
+    normalize.add_argument('--compression', choices=['gzip', 'zstd'])
+    normalize.add_argument('--index-db', help='segment index to update with the normalized documents')
+    normalize.set_defaults(func=run_normalize)
+
+    classify = commands.add_parser('classify', help='classify normalized text into ESG categories')
+    classify.add_argument('directories', nargs='+')
+    classify.add_argument('--backend', choices=['rules', 'ml'], default='rules')
+    classify.set_defaults(func=run_classify)
+
+    facts = commands.add_parser('facts', help='extract numeric facts from normalized text and query them')
+    facts.add_argument('directories', nargs='*')
+    facts.add_argument('--db', default='esg_facts.db')
+    facts.add_argument('--metric', help="print a company x year table, e.g. 'Scope 1 emissions'")
+    facts.add_argument('--unit')
+    facts.set_defaults(func=run_facts)
+
+    search = commands.add_parser('search', help='search normalized text segments by term, category, company and year')
+    search.add_argument('query', nargs='?', help="terms that must all occur; a trailing '*' matches by prefix")
+    search.add_argument('--index', nargs='+', metavar='DIRECTORY', help='index these normalized text folders first')
+    search.add_argument('--db', default='segment_index.db')
+    search.add_argument('--category', nargs='+')
+    search.add_argument('--company', nargs='+')
+    search.add_argument('--year', nargs='+', type=int)
+    search.add_argument('--method')
+    search.add_argument('--limit', type=int, default=50)
+    search.set_defaults(func=run_search)
+
+    pipeline = commands.add_parser('pipeline', help='run the full textual pipeline incrementally')
+    pipeline.add_argument('input_folder')
+    pipeline.add_argument('--output-root', default='.')
+    pipeline.add_argument('--methods', nargs='+', choices=TEXT_METHODS)
+    pipeline.add_argument('--workers', type=int)
+    pipeline.add_argument('--compression', choices=['gzip', 'zstd'])
+    pipeline.set_defaults(func=run_pipeline)
+
+    viz = commands.add_parser('viz', help='plot table extraction performance')
+    viz.add_argument('--performance-csv', default='./performance_metrics/table_extraction_performance.csv',
+                     help='performance CSV, or the metrics database (.db) to plot its latest run')
+    viz.add_argument('--incremental', action='store_true',
+                     help='cache aggregates, skip unchanged figures and render in parallel')
+    viz.add_argument('--workers', type=int)
+    viz.set_defaults(func=run_viz)
+
+    startup = commands.add_parser('startup', help='benchmark startup and import time per command')
+    startup.add_argument('--repeat', type=int, default=5)
+    startup.set_defaults(func=run_startup)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()